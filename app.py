@@ -1,10 +1,13 @@
 import streamlit as st
 import sys
 import os
+import io
+import csv
+import html
+import json
+import re
 import time
 from datetime import datetime
-import pandas as pd
-import plotly.express as px
 
 # Add src and auth directories to Python path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
@@ -16,11 +19,8 @@ from auth.auth import AuthManager, create_auth_sidebar
 from prediction_engine import HealthPredictor
 from recommendation_system import HealthRecommendationSystem
 from visualization import HealthVisualization
-from pdf_generator import HealthReportGenerator
-from report_analyzer import create_report_upload_interface, display_report_analysis_results, MedicalReportAnalyzer
-
-# Remove authentication imports - keeping only health_trends for dashboard
-from health_trends import HealthTrendsDashboard
+# pdf_generator and report_analyzer are imported where they are used
+# so sessions that never export or upload a report don't pay for them
 
 # Page configuration
 st.set_page_config(
@@ -31,7 +31,7 @@ st.set_page_config(
 )
 
 # Custom CSS for better styling
-st.markdown("""
+CUSTOM_CSS = """
 <style>
     .main-header {
         font-size: 3rem;
@@ -89,7 +89,27 @@ st.markdown("""
         border-top: 1px solid #dee2e6;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+# Not gated behind session_state: Streamlit drops any element a rerun does not
+# emit, so injecting the stylesheet only once would unstyle every later rerun
+st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
+
+# Severity -> (CSS class, icon, Streamlit alert) for the top prediction banner
+SEVERITY_STYLES = {
+    'Severe': ('severe-warning', '🔴', st.error),
+    'Moderate': ('warning-box', '🟡', st.warning),
+}
+DEFAULT_SEVERITY_STYLE = ('mild-info', '🟢', st.info)
+
+# Columns per row in the "All Predictions" grid
+PREDICTION_COLS = 3
+
+# Result and welcome screen views (rendered one at a time, see main())
+RESULT_VIEWS = [
+    "🎯 Predictions", "📋 Recommendations", "📊 Analysis", "📈 Insights", "📄 Report", "📋 Report Upload"
+]
+WELCOME_VIEWS = ["🎯 Symptom Analysis", "📋 Medical Report Upload"]
 
 # Initialize session state
 if 'predictions' not in st.session_state:
@@ -100,20 +120,98 @@ if 'user_symptoms' not in st.session_state:
     st.session_state.user_symptoms = ""
 
 @st.cache_resource
-def load_models():
-    """Load the prediction models and systems"""
+def get_auth_manager():
+    """Create the authentication manager once and reuse it across reruns"""
+    return AuthManager()
+
+@st.cache_resource
+def get_predictor():
+    """Load the prediction engine on first use"""
+    try:
+        return HealthPredictor()
+    except Exception as e:
+        st.error(f"Error loading prediction engine: {str(e)}")
+        return None
+
+@st.cache_resource
+def get_rec_system():
+    """Load the recommendation system on first use"""
+    try:
+        return HealthRecommendationSystem()
+    except Exception as e:
+        st.error(f"Error loading recommendation system: {str(e)}")
+        return None
+
+@st.cache_resource
+def get_viz_system():
+    """Load the visualization system on first use"""
     try:
-        predictor = HealthPredictor()
-        rec_system = HealthRecommendationSystem()
-        viz_system = HealthVisualization()
-        return predictor, rec_system, viz_system
+        return HealthVisualization()
     except Exception as e:
-        st.error(f"Error loading models: {str(e)}")
-        return None, None, None
+        st.error(f"Error loading visualization system: {str(e)}")
+        return None
+
+# Word-level split of the free-text symptom box (commas and whitespace)
+SYMPTOM_WORD_SPLIT = re.compile(r'[,\s]+')
+
+def normalize_symptoms(user_symptoms):
+    """Canonical, hashable form of the symptom input (order is kept: bigrams span symptoms)"""
+    return tuple(s.strip().lower() for s in user_symptoms.split(',') if s.strip())
+
+@st.cache_data(max_entries=256, ttl=3600, show_spinner=False)
+def cached_hybrid_prediction(_predictor, symptoms_key, top_n=3):
+    """Run hybrid prediction once per normalized symptom list"""
+    return _predictor.hybrid_prediction(", ".join(symptoms_key), top_n=top_n)
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def collect_symptoms(user_symptoms, matched_symptoms):
+    """Sorted, title-cased symptoms from the user input (words) and matched profiles (phrases)"""
+    candidates = [word for word in SYMPTOM_WORD_SPLIT.split(user_symptoms) if word]
+    candidates += [symptom for matched in matched_symptoms for symptom in matched.split(';')]
+    return sorted({clean for clean in (s.strip().title() for s in candidates) if len(clean) > 2})
+
+def _json_cache_key(value):
+    """Cache key for JSON-like prediction data: one C-level dumps instead of
+    Streamlit's per-element hasher walk (~0.5 ms for a 10-item prediction list)"""
+    return json.dumps(value, default=str)
+
+# hash_funcs for st.cache_data arguments holding predictions/recommendations
+JSON_HASH_FUNCS = {list: _json_cache_key, dict: _json_cache_key}
+
+@st.cache_data(max_entries=64, show_spinner=False, hash_funcs=JSON_HASH_FUNCS)
+def predictions_csv(predictions):
+    """Serialize predictions to CSV once per distinct prediction list"""
+    fieldnames = list(dict.fromkeys(key for pred in predictions for key in pred))
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames, lineterminator='\n')
+    writer.writeheader()
+    writer.writerows(predictions)
+    return buffer.getvalue()
+
+@st.cache_data(max_entries=64, show_spinner=False, hash_funcs=JSON_HASH_FUNCS)
+def chart_figure(_viz_system, chart_name, data):
+    """Build a visualization figure once per chart and prediction data"""
+    return getattr(_viz_system, chart_name)(data)
+
+@st.cache_resource
+def get_pdf_generator():
+    """Build the report generator (stylesheet setup) once and reuse it across reruns"""
+    from pdf_generator import HealthReportGenerator
+    return HealthReportGenerator()
+
+@st.cache_data(max_entries=32, show_spinner=False, hash_funcs=JSON_HASH_FUNCS)
+def pdf_report_bytes(user_symptoms, predictions, recommendations):
+    """Render the PDF once per analysis; recommendations carry their own timestamp"""
+    return get_pdf_generator().generate_pdf_bytes(user_symptoms, predictions, recommendations)
+
+def bullet_list(items):
+    """Render items as one markdown list element instead of one st.write per item"""
+    if items:
+        st.markdown("\n".join(f"- {item}" for item in items))
 
 def main():
-    # Initialize authentication manager
-    auth_manager = AuthManager()
+    # Get cached authentication manager
+    auth_manager = get_auth_manager()
     
     # Check authentication
     if not auth_manager.is_authenticated():
@@ -129,13 +227,6 @@ def main():
         auth_manager.show_auth_interface()
         return
     
-    # Load models
-    predictor, rec_system, viz_system = load_models()
-    
-    if not all([predictor, rec_system, viz_system]):
-        st.error("Failed to load the health analysis system. Please check the configuration.")
-        return
-    
     # Main header
     st.markdown('<div class="main-header">🏥 AI-Powered Health Analyzer</div>', unsafe_allow_html=True)
     st.markdown("""
@@ -167,7 +258,6 @@ def main():
             )
         
         elif input_method == "Symptom Checklist":
-            st.write("**Common Symptoms:**")
             symptom_options = [
                 "fever", "cough", "headache", "fatigue", "sore throat",
                 "runny nose", "body ache", "chills", "nausea", "vomiting",
@@ -175,10 +265,12 @@ def main():
                 "dizziness", "joint pain", "muscle pain", "skin rash"
             ]
             
-            selected_symptoms = []
-            for symptom in symptom_options:
-                if st.checkbox(symptom.title()):
-                    selected_symptoms.append(symptom)
+            # One widget instead of a checkbox per symptom
+            selected_symptoms = st.multiselect(
+                "**Common Symptoms:**",
+                symptom_options,
+                format_func=str.title
+            )
             
             user_symptoms = ", ".join(selected_symptoms)
         
@@ -196,9 +288,15 @@ def main():
                 st.session_state.user_symptoms = user_symptoms
                 
                 with st.spinner("Analyzing your symptoms..."):
+                    # Models load on the first analysis, not on login
+                    predictor = get_predictor()
+                    rec_system = get_rec_system()
+                    
                     # Get predictions
                     if predictor is not None:
-                        predictions = predictor.hybrid_prediction(user_symptoms, top_n=3)
+                        predictions = cached_hybrid_prediction(
+                            predictor, normalize_symptoms(user_symptoms), top_n=3
+                        )
                         st.session_state.predictions = predictions
                     else:
                         st.error("Prediction engine is not available. Please reload the page or check the configuration.")
@@ -219,9 +317,9 @@ def main():
         
         # Clear results button
         if st.button("🗑️ Clear Results"):
-            st.session_state.predictions = None
-            st.session_state.recommendations = None
-            st.session_state.user_symptoms = ""
+            # Drop the keys outright; the rerun re-seeds them with their defaults
+            for key in ('predictions', 'recommendations', 'user_symptoms'):
+                st.session_state.pop(key, None)
             st.rerun()
     
     # Main content area
@@ -229,12 +327,11 @@ def main():
         predictions = st.session_state.predictions
         recommendations = st.session_state.recommendations
         
-        # Display results in tabs
-        tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
-            "🎯 Predictions", "📋 Recommendations", "📊 Analysis", "📈 Insights", "📄 Report", "📋 Report Upload"
-        ])
+        # Display results as views; unlike st.tabs, only the selected view's code runs
+        active_view = st.radio("View:", RESULT_VIEWS, horizontal=True, key="active_view",
+                               label_visibility="collapsed")
         
-        with tab1:
+        if active_view == RESULT_VIEWS[0]:
             st.markdown('<div class="sub-header">Disease Predictions</div>', unsafe_allow_html=True)
             
             if predictions:
@@ -243,15 +340,9 @@ def main():
                 severity = top_pred['severity']
                 
                 # Choose styling based on severity
-                if severity == 'Severe':
-                    st.markdown(f'<div class="severe-warning">', unsafe_allow_html=True)
-                    st.error(f"🔴 **TOP PREDICTION: {top_pred['disease']}** ({top_pred['confidence']:.1f}% confidence)")
-                elif severity == 'Moderate':
-                    st.markdown(f'<div class="warning-box">', unsafe_allow_html=True)
-                    st.warning(f"🟡 **TOP PREDICTION: {top_pred['disease']}** ({top_pred['confidence']:.1f}% confidence)")
-                else:
-                    st.markdown(f'<div class="mild-info">', unsafe_allow_html=True)
-                    st.info(f"🟢 **TOP PREDICTION: {top_pred['disease']}** ({top_pred['confidence']:.1f}% confidence)")
+                css_class, icon, show = SEVERITY_STYLES.get(severity, DEFAULT_SEVERITY_STYLE)
+                st.markdown(f'<div class="{css_class}">', unsafe_allow_html=True)
+                show(f"{icon} **TOP PREDICTION: {top_pred['disease']}** ({top_pred['confidence']:.1f}% confidence)")
                 
                 st.write(f"**Description:** {top_pred['description']}")
                 st.write(f"**Severity Level:** {severity}")
@@ -259,10 +350,11 @@ def main():
                 
                 # Display all predictions in columns
                 st.markdown("### All Predictions:")
-                cols = st.columns(len(predictions))
-                
-                for i, (pred, col) in enumerate(zip(predictions, cols)):
-                    with col:
+                for i, pred in enumerate(predictions):
+                    # Wrap onto a new fixed-width row every PREDICTION_COLS predictions
+                    if i % PREDICTION_COLS == 0:
+                        cols = st.columns(PREDICTION_COLS)
+                    with cols[i % PREDICTION_COLS]:
                         st.markdown(f"**{i+1}. {pred['disease']}**")
                         st.metric("Confidence", f"{pred['confidence']:.1f}%")
                         st.write(f"Severity: {pred['severity']}")
@@ -270,7 +362,7 @@ def main():
             else:
                 st.warning("No predictions available.")
         
-        with tab2:
+        elif active_view == RESULT_VIEWS[1]:
             st.markdown('<div class="sub-header">Health Recommendations</div>', unsafe_allow_html=True)
             
             if recommendations and 'error' not in recommendations:
@@ -295,129 +387,115 @@ def main():
                     # Lifestyle recommendations
                     if recommendations.get('lifestyle_recommendations'):
                         st.markdown("### 🏃‍♂️ Lifestyle Recommendations")
-                        for rec in recommendations['lifestyle_recommendations'][:6]:
-                            st.write(f"• {rec}")
+                        bullet_list(recommendations['lifestyle_recommendations'][:6])
                     
                     # Self-care tips
                     if recommendations.get('self_care_tips'):
                         st.markdown("### 💆‍♀️ Self-Care Tips")
-                        for tip in recommendations['self_care_tips'][:4]:
-                            st.write(f"• {tip}")
+                        bullet_list(recommendations['self_care_tips'][:4])
                 
                 with col2:
                     # Dietary recommendations
                     if recommendations.get('dietary_recommendations'):
                         st.markdown("### 🍽️ Dietary Recommendations")
-                        for rec in recommendations['dietary_recommendations'][:5]:
-                            st.write(f"• {rec}")
+                        bullet_list(recommendations['dietary_recommendations'][:5])
                     
                     # Follow-up care
                     if recommendations.get('followup_recommendations'):
                         st.markdown("### 📅 Follow-up Care")
-                        for followup in recommendations['followup_recommendations']:
-                            st.write(f"• {followup}")
+                        bullet_list(recommendations['followup_recommendations'])
                 
                 # Warning signs
                 if recommendations.get('warning_signs'):
                     st.markdown("### 🚨 Seek Immediate Medical Attention If:")
+                    warning_signs = recommendations['warning_signs'][:6]
                     warning_cols = st.columns(2)
-                    for i, warning in enumerate(recommendations['warning_signs'][:6]):
-                        with warning_cols[i % 2]:
-                            st.write(f"• {warning}")
+                    for i, warning_col in enumerate(warning_cols):
+                        with warning_col:
+                            bullet_list(warning_signs[i::2])
                 
                 # Medical disclaimer
                 disclaimer = recommendations.get('disclaimer', {})
                 st.markdown("---")
                 st.markdown(f"### {disclaimer.get('title', '⚠️ Medical Disclaimer')}")
-                for content in disclaimer.get('content', []):
-                    st.write(f"• {content}")
+                bullet_list(disclaimer.get('content', []))
         
-        with tab3:
+        elif active_view == RESULT_VIEWS[2]:
             st.markdown('<div class="sub-header">Visual Analysis</div>', unsafe_allow_html=True)
             
+            viz_system = get_viz_system()
+            if viz_system is None:
+                st.stop()
+            
             # Create visualizations
             col1, col2 = st.columns(2)
             
             with col1:
                 # Confidence bar chart
                 st.markdown("#### Disease Confidence Levels")
-                bar_fig = viz_system.create_confidence_bar_chart(predictions)
+                bar_fig = chart_figure(viz_system, 'create_confidence_bar_chart', predictions)
                 if bar_fig:
-                    st.pyplot(bar_fig)
+                    st.plotly_chart(bar_fig, use_container_width=True)
                 
                 # Pie chart
                 st.markdown("#### Probability Distribution")
-                pie_fig = viz_system.create_confidence_pie_chart(predictions)
+                pie_fig = chart_figure(viz_system, 'create_confidence_pie_chart', predictions)
                 if pie_fig:
-                    st.pyplot(pie_fig)
+                    st.plotly_chart(pie_fig, use_container_width=True)
             
             with col2:
                 # Interactive gauge for top prediction
                 st.markdown("#### Top Prediction Confidence")
-                gauge_fig = viz_system.create_confidence_gauge(predictions[0])
+                gauge_fig = chart_figure(viz_system, 'create_confidence_gauge', predictions[0])
                 if gauge_fig:
                     st.plotly_chart(gauge_fig, use_container_width=True)
                 
                 # Severity distribution
                 st.markdown("#### Severity Analysis")
-                severity_fig = viz_system.create_severity_distribution_chart(predictions)
+                severity_fig = chart_figure(viz_system, 'create_severity_distribution_chart', predictions)
                 if severity_fig:
-                    st.pyplot(severity_fig)
+                    st.plotly_chart(severity_fig, use_container_width=True)
             
             # Symptom Analysis Overview
             st.markdown("#### Your Symptoms Analysis")
             
             # Create symptom display
-            all_symptoms = set()
-            
-            # Add user symptoms
-            if st.session_state.user_symptoms:
-                for symptom in st.session_state.user_symptoms.replace(',', ' ').split():
-                    clean = symptom.strip().title()
-                    if clean and len(clean) > 2:
-                        all_symptoms.add(clean)
-            
-            # Add symptoms from predictions
-            for pred in predictions:
-                if 'matched_symptoms' in pred:
-                    for symptom in pred['matched_symptoms'].split(';'):
-                        clean = symptom.strip().title()
-                        if clean and len(clean) > 2:
-                            all_symptoms.add(clean)
-            
-            symptoms_list = sorted(list(all_symptoms))
+            symptoms_list = collect_symptoms(
+                st.session_state.user_symptoms,
+                tuple(pred['matched_symptoms'] for pred in predictions if 'matched_symptoms' in pred)
+            )
             
             if symptoms_list:
-                # Display in a colorful grid
-                cols_per_row = 3
+                # Display in a colorful grid, emitted as a single element
                 colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEAA7', '#DDA0DD']
-                
-                for i in range(0, len(symptoms_list), cols_per_row):
-                    cols = st.columns(cols_per_row)
-                    row_symptoms = symptoms_list[i:i+cols_per_row]
-                    for j, symptom in enumerate(row_symptoms):
-                        with cols[j]:
-                            color = colors[(i + j) % len(colors)]
-                            st.markdown(f'''
-                            <div style="background: {color}; color: white; padding: 15px; 
-                                        border-radius: 10px; text-align: center; margin: 5px; 
-                                        font-weight: bold; font-size: 14px;
-                                        box-shadow: 0 4px 6px rgba(0,0,0,0.1);">
-                                {symptom}
-                            </div>''', unsafe_allow_html=True)
+                tiles = "".join(
+                    f'''<div style="background: {colors[i % len(colors)]}; color: white; padding: 15px; 
+                                border-radius: 10px; text-align: center; 
+                                font-weight: bold; font-size: 14px;
+                                box-shadow: 0 4px 6px rgba(0,0,0,0.1);">{html.escape(symptom)}</div>'''
+                    for i, symptom in enumerate(symptoms_list)
+                )
+                st.markdown(
+                    f'<div style="display: grid; grid-template-columns: repeat(3, 1fr); gap: 10px;">{tiles}</div>',
+                    unsafe_allow_html=True
+                )
             else:
                 st.info("Enter symptoms above to see your symptom analysis")
         
-        with tab4:
+        elif active_view == RESULT_VIEWS[3]:
             st.markdown('<div class="sub-header">Detailed Insights</div>', unsafe_allow_html=True)
             
+            viz_system = get_viz_system()
+            if viz_system is None:
+                st.stop()
+            
             # Interactive confidence chart
-            interactive_fig = viz_system.create_interactive_confidence_chart(predictions)
+            interactive_fig = chart_figure(viz_system, 'create_interactive_confidence_chart', predictions)
             if interactive_fig:
                 st.plotly_chart(interactive_fig, use_container_width=True)
             
             # Comparison chart
-            comparison_fig = viz_system.create_prediction_comparison_chart(predictions)
+            comparison_fig = chart_figure(viz_system, 'create_prediction_comparison_chart', predictions)
             if comparison_fig:
                 st.plotly_chart(comparison_fig, use_container_width=True)
             
@@ -433,12 +511,16 @@ def main():
                         st.write(f"**Precautions:** {pred['precautions']}")
                         st.write(f"**Diet Recommendations:** {pred['diet_recommendations']}")
         
-        with tab5:
+        elif active_view == RESULT_VIEWS[4]:
             st.markdown('<div class="sub-header">Health Report</div>', unsafe_allow_html=True)
-            
+
+            # One timestamp for the summary and both export file names
+            now = datetime.now()
+            file_stamp = now.strftime('%Y%m%d_%H%M%S')
+
             # Report summary
             report_data = {
-                "Analysis Date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "Analysis Date": now.strftime("%Y-%m-%d %H:%M:%S"),
                 "Input Symptoms": st.session_state.user_symptoms,
                 "Top Prediction": f"{predictions[0]['disease']} ({predictions[0]['confidence']:.1f}%)",
                 "Severity Level": predictions[0]['severity'],
@@ -446,8 +528,7 @@ def main():
             }
             
             st.markdown("### 📊 Report Summary")
-            for key, value in report_data.items():
-                st.write(f"**{key}:** {value}")
+            st.markdown("\n\n".join(f"**{key}:** {value}" for key, value in report_data.items()))
             
             # Export functionality
             st.markdown("### 📥 Export Options")
@@ -457,8 +538,7 @@ def main():
                 if st.button("📄 Generate PDF Report"):
                     with st.spinner("Generating PDF report..."):
                         try:
-                            pdf_generator = HealthReportGenerator()
-                            pdf_buffer = pdf_generator.generate_pdf_buffer(
+                            pdf_bytes = pdf_report_bytes(
                                 st.session_state.user_symptoms, 
                                 predictions, 
                                 recommendations
@@ -466,8 +546,8 @@ def main():
                             
                             st.download_button(
                                 label="⬇️ Download PDF Report",
-                                data=pdf_buffer.getvalue(),
-                                file_name=f"health_analysis_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
+                                data=pdf_bytes,
+                                file_name=f"health_analysis_report_{file_stamp}.pdf",
                                 mime="application/pdf"
                             )
                             st.success("PDF report generated successfully!")
@@ -480,17 +560,17 @@ def main():
             
             with col3:
                 # CSV export of predictions
-                df = pd.DataFrame(predictions)
-                csv = df.to_csv(index=False)
+                csv = predictions_csv(predictions)
                 st.download_button(
                     label="📊 Download CSV",
                     data=csv,
-                    file_name=f"health_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                    file_name=f"health_analysis_{file_stamp}.csv",
                     mime="text/csv"
                 )
         
-        with tab6:
+        elif active_view == RESULT_VIEWS[5]:
             # Medical Report Upload and Analysis
+            from report_analyzer import create_report_upload_interface
             create_report_upload_interface()
     
     else:
@@ -498,11 +578,10 @@ def main():
         st.markdown("## 👋 Welcome to AI Health Analyzer")
         
         # Main feature tabs on welcome screen
-        welcome_tab1, welcome_tab2 = st.tabs([
-            "🎯 Symptom Analysis", "📋 Medical Report Upload"
-        ])
+        welcome_view = st.radio("View:", WELCOME_VIEWS, horizontal=True, key="welcome_view",
+                                label_visibility="collapsed")
         
-        with welcome_tab1:
+        if welcome_view == WELCOME_VIEWS[0]:
             col1, col2, col3 = st.columns(3)
             
             with col1:
@@ -529,8 +608,9 @@ def main():
                 - Comprehensive health reports
                 """)
         
-        with welcome_tab2:
+        elif welcome_view == WELCOME_VIEWS[1]:
             # Medical Report Upload Feature
+            from report_analyzer import create_report_upload_interface
             create_report_upload_interface()
         
         st.markdown("---")
@@ -7,12 +7,18 @@ This module provides functions for database operations, including:
 - Medical reports storage
 """
 
+import os
 import json
+import hashlib
+import threading
 import streamlit as st
 import bcrypt
+from collections import Counter
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Optional, List, Dict, Any, Tuple
+from typing import Optional, List, Dict, Any, Tuple, Iterator
 
+from sqlalchemy import func, inspect, lambda_stmt, or_, select, text, update
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 
@@ -21,46 +27,246 @@ from database_models import (
     User, HealthSession, MedicalReport
 )
 
+# Optional fast JSON encoder for the prediction/analysis payload columns
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Optional Argon2id password hashing (opt in with PASSWORD_HASHER=argon2)
+try:
+    from argon2 import PasswordHasher
+    from argon2.exceptions import InvalidHashError, VerificationError
+    ARGON2_AVAILABLE = True
+except ImportError:
+    ARGON2_AVAILABLE = False
+
+# bcrypt work factor: each +1 doubles hashing time (10 ~ 60ms, 12 ~ 250ms on common x86)
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '12'))
+
+# Hash for new passwords: 'bcrypt' (default) or 'argon2'; both are always verifiable
+PASSWORD_HASHER = os.getenv('PASSWORD_HASHER', 'bcrypt').lower()
+
+# Uploaded report files live here, outside the database rows
+UPLOAD_DIR = os.getenv('UPLOAD_DIR', 'uploads')
+
+# 64 MiB, 2 passes, 2 lanes: Argon2id parameters in line with OWASP guidance
+_ARGON2 = PasswordHasher(time_cost=2, memory_cost=65536, parallelism=2) if ARGON2_AVAILABLE else None
+
+
+def _upload_path(file_data: bytes) -> Tuple[str, str]:
+    """Content-addressed location of an uploaded file; returns (path, sha256)"""
+    digest = hashlib.sha256(file_data).hexdigest()
+    return os.path.join(UPLOAD_DIR, digest[:2], digest), digest
+
+
+def _store_upload(path: str, file_data: bytes) -> bool:
+    """Write an uploaded file to its path; returns True if this call created it"""
+    if os.path.exists(path):  # identical uploads are stored once
+        return False
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(file_data)
+    os.replace(tmp_path, path)
+    return True
+
+
+# Columns exported per session/report: the fields their to_dict() exposes
+_SESSION_EXPORT_COLUMNS = (
+    HealthSession.id, HealthSession.user_id, HealthSession.session_date,
+    HealthSession.input_symptoms, HealthSession.input_method,
+    HealthSession.top_prediction, HealthSession.top_confidence,
+    HealthSession.severity_level, HealthSession.processing_time
+)
+_REPORT_EXPORT_COLUMNS = (
+    MedicalReport.id, MedicalReport.user_id, MedicalReport.uploaded_at,
+    MedicalReport.original_filename, MedicalReport.file_type,
+    MedicalReport.urgency_level, MedicalReport.confidence_score
+)
+
+
+# Columns added after the first release. create_all only creates missing tables,
+# so init_database adds these to tables created by an older schema.
+_ADDED_COLUMNS = (
+    HealthSession.__table__.c.input_symptoms_list,
+    MedicalReport.__table__.c.file_path,
+    MedicalReport.__table__.c.file_sha256,
+)
+
+
+def _as_bytes(password_hash) -> bytes:
+    """Stored hash as bytes (rows written before password_hash became binary hold str)"""
+    return password_hash.encode('utf-8') if isinstance(password_hash, str) else password_hash
+
+
+def _verify_argon2(password: str, password_hash: bytes) -> bool:
+    """Argon2 check with bcrypt.checkpw's contract: False instead of an exception"""
+    try:
+        return _ARGON2.verify(password_hash.decode('utf-8'), password)
+    except (VerificationError, InvalidHashError):
+        return False
+
+
+def _split_symptoms(input_symptoms: Optional[str]) -> List[str]:
+    """Normalized symptom list from the comma-separated input text"""
+    if not input_symptoms:
+        return []
+    return [sym.strip().lower() for sym in input_symptoms.split(',') if sym.strip()]
+
+
+def _to_json(data: Any) -> str:
+    """Serialize a payload for the JSON Text columns (orjson when installed)"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(
+            data, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        ).decode('utf-8')
+    return json.dumps(data)
+
 
 class DatabaseManager:
     """Database management class for authentication and data operations"""
     
-    def __init__(self):
+    def __init__(self, bcrypt_rounds: int = BCRYPT_ROUNDS, password_hasher: str = PASSWORD_HASHER):
         """Initialize database manager"""
+        self.bcrypt_rounds = bcrypt_rounds
+        if password_hasher == 'argon2' and not ARGON2_AVAILABLE:
+            print("⚠️ PASSWORD_HASHER=argon2 but argon2-cffi is not installed; using bcrypt")
+            password_hasher = 'bcrypt'
+        self.password_hasher = password_hasher
         self.engine, self.SessionLocal = create_engine_and_session()
         self.init_database()
+        # Hash checked on unknown-user logins so they cost the same as a wrong password
+        self._dummy_hash = self._make_dummy_hash()
     
     def init_database(self):
-        """Initialize database tables if they don't exist"""
+        """Initialize database tables if they don't exist and bring older tables up to date"""
         try:
             create_tables(self.engine)
+            self._migrate_schema()
         except Exception as e:
             print(f"⚠️ Database initialization error: {e}")
     
+    def _migrate_schema(self):
+        """Add columns that tables created by an older schema are missing (idempotent)"""
+        existing = {}
+        with self.engine.begin() as conn:
+            if self.engine.dialect.name == 'sqlite':
+                # password_hash used to be VARCHAR. The declared type of an existing
+                # column never changes, but SQLite's TEXT affinity leaves BLOB values
+                # alone, so old str hashes can be converted in place. Other backends
+                # rely on _as_bytes for rows that still hold str.
+                conn.execute(text(
+                    "UPDATE users SET password_hash = CAST(password_hash AS BLOB) "
+                    "WHERE typeof(password_hash) = 'text'"
+                ))
+            inspector = inspect(conn)
+            for column in _ADDED_COLUMNS:
+                table = column.table.name
+                if table not in existing:
+                    existing[table] = {col['name'] for col in inspector.get_columns(table)}
+                if column.name in existing[table]:
+                    continue
+                column_type = column.type.compile(dialect=self.engine.dialect)
+                conn.execute(text(f'ALTER TABLE {table} ADD COLUMN {column.name} {column_type}'))
+                existing[table].add(column.name)
+                print(f"✅ Added column {table}.{column.name}")
+            # Indexes on the added columns (skipped when they already exist)
+            for table in {column.table for column in _ADDED_COLUMNS}:
+                for index in table.indexes:
+                    index.create(conn, checkfirst=True)
+    
     def get_db_session(self) -> Session:
         """Get a new database session"""
         return self.SessionLocal()
     
+    @contextmanager
+    def _session(self) -> Iterator[Session]:
+        """Session scope that commits on success, rolls back on error and always closes.
+
+        Objects are not expired on commit, so ORM instances returned from the
+        block stay readable after the session is closed.
+        """
+        db = self.SessionLocal(expire_on_commit=False)
+        try:
+            yield db
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+    
+    @contextmanager
+    def _read_session(self) -> Iterator[Session]:
+        """Session scope for read-only paths: no flushes, no commit, returned rows stay loaded"""
+        db = self.SessionLocal(autoflush=False, expire_on_commit=False)
+        try:
+            yield db
+        finally:
+            db.close()
+    
     # ---- User Authentication ----
     
+    def hash_password(self, password: str) -> bytes:
+        """Hash a password with the configured hasher (bcrypt cost or Argon2id)"""
+        if self.password_hasher == 'argon2':
+            return _ARGON2.hash(password).encode('utf-8')
+        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(self.bcrypt_rounds))
+    
+    def _check_password(self, password: str, password_hash: bytes) -> bool:
+        """Check a password against a bcrypt or Argon2 hash"""
+        if password_hash.startswith(b'$argon2'):
+            if not ARGON2_AVAILABLE:
+                print("⚠️ Found an Argon2 password hash but argon2-cffi is not installed")
+                return False
+            return _verify_argon2(password, password_hash)
+        return bcrypt.checkpw(password.encode('utf-8'), password_hash)
+    
+    def _make_dummy_hash(self) -> bytes:
+        """Dummy hash in the scheme most stored password hashes use"""
+        # With PASSWORD_HASHER=argon2, accounts keep their bcrypt hash until they next
+        # log in, so the configured hasher alone would make misses slower than hits
+        hasher = self.password_hasher
+        try:
+            with self._read_session() as db:
+                total, argon2_count = db.execute(
+                    select(
+                        func.count(User.id),
+                        func.count(User.id).filter(func.substr(User.password_hash, 1, 7) == b'$argon2')
+                    )
+                ).one()
+            if total:
+                hasher = 'argon2' if ARGON2_AVAILABLE and argon2_count * 2 > total else 'bcrypt'
+        except Exception as e:
+            print(f"⚠️ Could not inspect stored password hashes: {e}")
+        if hasher == 'argon2':
+            return _ARGON2.hash('dummy-password').encode('utf-8')
+        return bcrypt.hashpw(b'dummy-password', bcrypt.gensalt(self.bcrypt_rounds))
+    
+    def _needs_rehash(self, password_hash: bytes) -> bool:
+        """Whether a verified hash should be upgraded to the configured Argon2 parameters"""
+        if self.password_hasher != 'argon2':
+            return False
+        if not password_hash.startswith(b'$argon2'):
+            return True
+        return _ARGON2.check_needs_rehash(password_hash.decode('utf-8'))
+    
     def create_user(self, username: str, email: str, password: str) -> Optional[User]:
         """Create a new user with hashed password"""
-        db = self.get_db_session()
+        db = self.SessionLocal(expire_on_commit=False)  # keep the returned row loaded after close
         try:
-            # Hash the password
-            password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
-            
             # Create new user
             new_user = User(
                 username=username,
                 email=email,
-                password_hash=password_hash.decode('utf-8'),
+                password_hash=self.hash_password(password),
                 created_at=datetime.utcnow()
             )
             
             db.add(new_user)
             db.commit()
-            db.refresh(new_user)
             return new_user
         except IntegrityError:
             db.rollback()
@@ -72,58 +278,87 @@ class DatabaseManager:
         finally:
             db.close()
     
+    # Hot per-login / per-rerun lookups use lambda_stmt: the statement is built and
+    # cache-keyed once per call site, and only the bound value changes between calls
+    
     def get_user_by_email(self, email: str) -> Optional[User]:
         """Get user by email"""
-        db = self.get_db_session()
-        try:
-            user = db.query(User).filter(User.email == email).first()
-            return user
-        finally:
-            db.close()
+        with self._read_session() as db:
+            return db.execute(
+                lambda_stmt(lambda: select(User).where(User.email == email))
+            ).scalars().first()
     
     def get_user_by_username(self, username: str) -> Optional[User]:
         """Get user by username"""
+        with self._read_session() as db:
+            return db.execute(
+                lambda_stmt(lambda: select(User).where(User.username == username))
+            ).scalars().first()
+    
+    @staticmethod
+    def _find_by_email_or_username(db: Session, identifier: str, *columns):
+        """Single-query email-or-username lookup (an email match wins).
+
+        With ``columns`` only those are fetched as a row tuple, not a mapped User.
+        """
+        query = db.query(*columns) if columns else db.query(User)
+        return query.filter(
+            or_(User.email == identifier, User.username == identifier)
+        ).order_by((User.email == identifier).desc()).first()
+    
+    def get_user_by_email_or_username(self, identifier: str) -> Optional[User]:
+        """Get user by email or username in a single query (email match wins)"""
         db = self.get_db_session()
         try:
-            user = db.query(User).filter(User.username == username).first()
-            return user
+            return self._find_by_email_or_username(db, identifier)
         finally:
             db.close()
     
     def get_user_by_id(self, user_id: int) -> Optional[User]:
         """Get user by ID"""
-        db = self.get_db_session()
-        try:
-            user = db.query(User).filter(User.id == user_id).first()
-            return user
-        finally:
-            db.close()
+        with self._read_session() as db:
+            return db.execute(
+                lambda_stmt(lambda: select(User).where(User.id == user_id))
+            ).scalars().first()
     
     def verify_password(self, user: User, password: str) -> bool:
         """Verify password against stored hash"""
         if not user or not user.password_hash:
             return False
-        return bcrypt.checkpw(password.encode('utf-8'), user.password_hash.encode('utf-8'))
+        return self._check_password(password, _as_bytes(user.password_hash))
     
-    def authenticate_user(self, email: str, password: str) -> Optional[User]:
-        """Authenticate user with email and password"""
-        user = self.get_user_by_email(email)
-        if not user or not self.verify_password(user, password):
-            return None
-        
-        # Update last login time
-        db = self.get_db_session()
-        try:
-            user.last_login = datetime.utcnow()
-            db.add(user)
+    def authenticate_user(self, email_or_username: str, password: str) -> Optional[User]:
+        """Authenticate user with email (or username) and password"""
+        with self._session() as db:
+            # Only the columns the check needs; a full User is loaded only on success
+            credentials = self._find_by_email_or_username(
+                db, email_or_username, User.id, User.password_hash
+            )
+            # End the read transaction so no database lock is held during the bcrypt check
             db.commit()
-        except Exception as e:
-            print(f"Error updating last login: {e}")
-            db.rollback()
-        finally:
-            db.close()
-        
-        return user
+            
+            if not credentials:
+                # Burn the same bcrypt work as a real check to avoid a user-enumeration timing oracle
+                self._check_password(password, self._dummy_hash)
+                return None
+            user_id, password_hash = credentials
+            password_hash = _as_bytes(password_hash)
+            if not password_hash or not self._check_password(password, password_hash):
+                return None
+            
+            # Update last login time (and upgrade the hash while we have the plaintext)
+            try:
+                values = {'last_login': datetime.utcnow()}
+                if self._needs_rehash(password_hash):
+                    values['password_hash'] = self.hash_password(password)
+                db.execute(update(User).where(User.id == user_id).values(**values))
+                db.commit()
+                _cached_user_dict.clear(user_id)
+            except Exception as e:
+                print(f"Error updating last login: {e}")
+                db.rollback()
+            
+            return db.get(User, user_id)
     
     def update_user_profile(self, user_id: int, data: Dict[str, Any]) -> bool:
         """Update user profile information"""
@@ -139,6 +374,7 @@ class DatabaseManager:
                     setattr(user, key, value)
             
             db.commit()
+            _cached_user_dict.clear(user_id)
             return True
         except Exception as e:
             print(f"Error updating user profile: {e}")
@@ -156,8 +392,7 @@ class DatabaseManager:
                 return False
             
             # Hash and set new password
-            password_hash = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt())
-            user.password_hash = password_hash.decode('utf-8')
+            user.password_hash = self.hash_password(new_password)
             
             db.commit()
             return True
@@ -175,7 +410,7 @@ class DatabaseManager:
         predictions: List[Dict], recommendations: Dict, processing_time: float
     ) -> Optional[HealthSession]:
         """Create a new health analysis session"""
-        db = self.get_db_session()
+        db = self.SessionLocal(expire_on_commit=False)  # keep the returned row loaded after close
         try:
             # Extract key information
             top_prediction = predictions[0]['disease'] if predictions else None
@@ -187,9 +422,10 @@ class DatabaseManager:
                 user_id=user_id,
                 session_date=datetime.utcnow(),
                 input_symptoms=input_symptoms,
+                input_symptoms_list=_split_symptoms(input_symptoms),
                 input_method=input_method,
-                predictions=json.dumps(predictions),
-                recommendations=json.dumps(recommendations),
+                predictions=_to_json(predictions),
+                recommendations=_to_json(recommendations),
                 top_prediction=top_prediction,
                 top_confidence=top_confidence,
                 severity_level=severity_level,
@@ -198,7 +434,6 @@ class DatabaseManager:
             
             db.add(new_session)
             db.commit()
-            db.refresh(new_session)
             return new_session
         except Exception as e:
             print(f"Error creating health session: {e}")
@@ -209,15 +444,12 @@ class DatabaseManager:
     
     def get_user_health_sessions(self, user_id: int, limit: int = 10) -> List[HealthSession]:
         """Get user's health analysis sessions"""
-        db = self.get_db_session()
-        try:
-            sessions = db.query(HealthSession).filter(
-                HealthSession.user_id == user_id
-            ).order_by(HealthSession.session_date.desc()).limit(limit).all()
-            
-            return sessions
-        finally:
-            db.close()
+        with self._read_session() as db:
+            return db.execute(
+                select(HealthSession).where(
+                    HealthSession.user_id == user_id
+                ).order_by(HealthSession.session_date.desc()).limit(limit)
+            ).scalars().all()
     
     # ---- Medical Reports ----
     
@@ -226,88 +458,115 @@ class DatabaseManager:
         analysis_results: Dict, extracted_text: str
     ) -> Optional[MedicalReport]:
         """Store a medical report and its analysis"""
-        db = self.get_db_session()
+        db = self.SessionLocal(expire_on_commit=False)  # keep the returned row loaded after close
+        created_file = None
         try:
             # Extract key information
             summary = analysis_results.get('summary', {})
             urgency_level = summary.get('urgency_level', 'Low')
             confidence_score = analysis_results.get('confidence_score', 0.0)
             
+            # Keep the file on disk; the row only records where it is
+            file_path, file_sha256 = _upload_path(file_data) if file_data is not None else (None, None)
+            
             # Create new report
             new_report = MedicalReport(
                 user_id=user_id,
                 uploaded_at=datetime.utcnow(),
                 original_filename=filename,
                 file_type=file_type,
-                file_data=file_data,
+                file_path=file_path,
+                file_sha256=file_sha256,
                 extracted_text=extracted_text,
-                analysis_results=json.dumps(analysis_results),
+                analysis_results=_to_json(analysis_results),
                 urgency_level=urgency_level,
                 confidence_score=confidence_score
             )
             
             db.add(new_report)
+            db.flush()
+            # Write the file only once the row is accepted
+            if file_path is not None and _store_upload(file_path, file_data):
+                created_file = file_path
             db.commit()
-            db.refresh(new_report)
             return new_report
         except Exception as e:
             print(f"Error storing medical report: {e}")
             db.rollback()
+            if created_file is not None:  # don't leave a file no row points to
+                try:
+                    os.remove(created_file)
+                except OSError:
+                    pass
             return None
         finally:
             db.close()
     
-    def get_user_medical_reports(self, user_id: int) -> List[MedicalReport]:
-        """Get user's medical reports"""
+    def get_report_file(self, report_id: int) -> Optional[bytes]:
+        """Read a stored report's file (disk copy, or the legacy in-row blob)"""
         db = self.get_db_session()
         try:
-            reports = db.query(MedicalReport).filter(
-                MedicalReport.user_id == user_id
-            ).order_by(MedicalReport.uploaded_at.desc()).all()
-            
-            return reports
+            report = db.query(MedicalReport).filter(MedicalReport.id == report_id).first()
+            if not report:
+                return None
+            if report.file_path:
+                with open(report.file_path, 'rb') as f:
+                    return f.read()
+            return report.file_data
         finally:
             db.close()
     
+    def get_user_medical_reports(self, user_id: int) -> List[MedicalReport]:
+        """Get user's medical reports"""
+        with self._read_session() as db:
+            return db.execute(
+                select(MedicalReport).where(
+                    MedicalReport.user_id == user_id
+                ).order_by(MedicalReport.uploaded_at.desc())
+            ).scalars().all()
+    
     # ---- User Health Summary ----
     
     def get_user_health_summary(self, user_id: int) -> Dict[str, Any]:
         """Get a summary of user's health data"""
-        db = self.get_db_session()
-        try:
-            # Count sessions and reports
-            total_sessions = db.query(HealthSession).filter(HealthSession.user_id == user_id).count()
-            total_reports = db.query(MedicalReport).filter(MedicalReport.user_id == user_id).count()
-            
-            # Get last analysis date
-            last_session = db.query(HealthSession).filter(
-                HealthSession.user_id == user_id
-            ).order_by(HealthSession.session_date.desc()).first()
-            
-            last_analysis = last_session.session_date.isoformat() if last_session else None
+        with self._read_session() as db:
+            # Session/report counts, last analysis date and average confidence in one query
+            report_count = select(func.count(MedicalReport.id)).where(
+                MedicalReport.user_id == user_id
+            ).scalar_subquery()
+            total_sessions, total_reports, last_session_date, avg_confidence = db.execute(
+                select(
+                    func.count(HealthSession.id),
+                    report_count,
+                    func.max(HealthSession.session_date),
+                    func.avg(HealthSession.top_confidence)
+                ).where(HealthSession.user_id == user_id)
+            ).one()
             
-            # Calculate average confidence
-            sessions = db.query(HealthSession).filter(HealthSession.user_id == user_id).all()
-            confidence_values = [s.top_confidence for s in sessions if s.top_confidence is not None]
-            avg_confidence = sum(confidence_values) / len(confidence_values) if confidence_values else 0
+            last_analysis = last_session_date.isoformat() if last_session_date else None
+            avg_confidence = avg_confidence or 0
             
             # Count severity distribution
-            severity_distribution = {}
-            for s in sessions:
-                if s.severity_level:
-                    severity_distribution[s.severity_level] = severity_distribution.get(s.severity_level, 0) + 1
+            severity_rows = db.execute(
+                select(HealthSession.severity_level, func.count(HealthSession.id)).where(
+                    HealthSession.user_id == user_id
+                ).group_by(HealthSession.severity_level)
+            ).all()
+            severity_distribution = {level: count for level, count in severity_rows if level}
             
             # Extract top symptoms (basic implementation)
-            all_symptoms = []
-            for s in sessions:
-                symptoms = s.input_symptoms.split(',') if s.input_symptoms else []
-                all_symptoms.extend([sym.strip().lower() for sym in symptoms if sym.strip()])
-            
-            symptom_counter = {}
-            for symptom in all_symptoms:
-                symptom_counter[symptom] = symptom_counter.get(symptom, 0) + 1
-            
-            top_symptoms = sorted(symptom_counter.items(), key=lambda x: x[1], reverse=True)[:5]
+            symptom_rows = db.execute(
+                select(HealthSession.input_symptoms_list, HealthSession.input_symptoms).where(
+                    HealthSession.user_id == user_id
+                )
+            ).all()
+            # Rows saved before input_symptoms_list existed are split on the fly
+            symptom_counter = Counter(
+                sym
+                for symptom_list, input_symptoms in symptom_rows
+                for sym in (symptom_list if symptom_list is not None else _split_symptoms(input_symptoms))
+            )
+            top_symptoms = symptom_counter.most_common(5)
             
             return {
                 'total_sessions': total_sessions,
@@ -317,41 +576,68 @@ class DatabaseManager:
                 'severity_distribution': severity_distribution,
                 'top_symptoms': top_symptoms
             }
-        finally:
-            db.close()
+    
+    def _export_rows(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Export payload with plain column rows (datetimes left as datetime objects)"""
+        with self._read_session() as db:
+            user = db.get(User, user_id)
+            if not user:
+                return None
+            
+            # Plain rows of the to_dict() columns, newest first; no ORM objects are built
+            sessions = db.execute(
+                select(*_SESSION_EXPORT_COLUMNS).where(
+                    HealthSession.user_id == user_id
+                ).order_by(HealthSession.session_date.desc()).limit(1000)
+            ).mappings().all()
+            reports = db.execute(
+                select(*_REPORT_EXPORT_COLUMNS).where(
+                    MedicalReport.user_id == user_id
+                ).order_by(MedicalReport.uploaded_at.desc())
+            ).mappings().all()
+            
+            return {
+                'user': user.to_dict(),
+                'sessions': [dict(row) for row in sessions],
+                'reports': [dict(row) for row in reports],
+                'export_date': datetime.utcnow()
+            }
     
     def export_user_data(self, user_id: int) -> Dict[str, Any]:
         """Export all user data for GDPR compliance"""
-        user = self.get_user_by_id(user_id)
-        if not user:
+        data = self._export_rows(user_id)
+        if data is None:
             return {}
         
-        user_data = user.to_dict()
-        
-        # Get sessions and reports
-        sessions = self.get_user_health_sessions(user_id, limit=1000)
-        reports = self.get_user_medical_reports(user_id)
-        
-        # Convert to dict (excluding binary data)
-        sessions_data = [session.to_dict() for session in sessions]
-        reports_data = [report.to_dict() for report in reports]
-        
-        return {
-            'user': user_data,
-            'sessions': sessions_data,
-            'reports': reports_data,
-            'export_date': datetime.utcnow().isoformat()
-        }
+        # Convert datetimes to ISO strings, as the models' to_dict() does
+        for key in ('sessions', 'reports'):
+            data[key] = [
+                {k: v.isoformat() if isinstance(v, datetime) else v for k, v in row.items()}
+                for row in data[key]
+            ]
+        data['export_date'] = data['export_date'].isoformat()
+        return data
+    
+    def export_user_data_json(self, user_id: int) -> bytes:
+        """Export all user data as UTF-8 JSON bytes, ready for a download button or file"""
+        data = self._export_rows(user_id) or {}
+        if ORJSON_AVAILABLE:
+            # orjson writes datetimes as ISO 8601 itself, no per-value Python call
+            return orjson.dumps(data)
+        return json.dumps(data, default=lambda value: value.isoformat()).encode('utf-8')
 
 
-# Singleton instance
+# Singleton instance (Streamlit runs each session's script on its own thread)
 _db_manager = None
+_db_manager_lock = threading.Lock()
 
 def get_database_manager() -> DatabaseManager:
     """Get singleton database manager instance"""
     global _db_manager
     if _db_manager is None:
-        _db_manager = DatabaseManager()
+        with _db_manager_lock:
+            if _db_manager is None:
+                _db_manager = DatabaseManager()
     return _db_manager
 
 
@@ -372,6 +658,18 @@ def is_user_logged_in() -> bool:
     """Check if user is currently logged in"""
     return st.session_state.get('is_authenticated', False)
 
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_user_dict(user_id: int) -> Dict[str, Any]:
+    """User profile dict, cached briefly so reruns don't re-query the users table.
+
+    Writes to a user's row clear only that user's entry (``_cached_user_dict.clear(user_id)``).
+    """
+    user = get_database_manager().get_user_by_id(user_id)
+    if not user:
+        return {}
+    
+    return user.to_dict()
+
 def get_current_user() -> Dict[str, Any]:
     """Get currently logged in user profile"""
     if not is_user_logged_in():
@@ -381,11 +679,7 @@ def get_current_user() -> Dict[str, Any]:
     if not user_id:
         return {}
     
-    user = get_database_manager().get_user_by_id(user_id)
-    if not user:
-        return {}
-    
-    return user.to_dict()
+    return _cached_user_dict(user_id)
 
 
 # Export main components
@@ -5,9 +5,9 @@ This module defines all database models including user authentication,
 health sessions, and medical reports.
 """
 
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Text, Float, Boolean, LargeBinary, ForeignKey
+from sqlalchemy import create_engine, event, Column, Integer, String, DateTime, Text, Float, Boolean, LargeBinary, ForeignKey, Index, JSON
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.orm import sessionmaker, relationship, deferred
 from datetime import datetime
 import os
 
@@ -17,10 +17,10 @@ class User(Base):
     """User model for authentication"""
     __tablename__ = 'users'
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)  # rowid alias: already the table's own index
     username = Column(String(80), unique=True, nullable=False, index=True)
     email = Column(String(120), unique=True, nullable=False, index=True)
-    password_hash = Column(String(200), nullable=False)
+    password_hash = Column(LargeBinary(128), nullable=False)  # Raw bcrypt (60) or Argon2id (~97) hash bytes
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     is_active = Column(Boolean, default=True, nullable=False)
     last_login = Column(DateTime, nullable=True)
@@ -43,11 +43,16 @@ class User(Base):
 class HealthSession(Base):
     """Health analysis session model"""
     __tablename__ = 'health_sessions'
+    __table_args__ = (
+        # Serves "a user's sessions, newest first" without a sort
+        Index('ix_health_sessions_user_date', 'user_id', 'session_date'),
+    )
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
     session_date = Column(DateTime, default=datetime.utcnow, nullable=False)
     input_symptoms = Column(Text, nullable=False)
+    input_symptoms_list = Column(JSON, nullable=True)  # Normalized symptoms, split once at insert
     input_method = Column(String(50), default='text_input')
     predictions = Column(Text, nullable=True)  # JSON string of predictions
     recommendations = Column(Text, nullable=True)  # JSON string of recommendations
@@ -76,15 +81,22 @@ class HealthSession(Base):
 class MedicalReport(Base):
     """Medical report storage model"""
     __tablename__ = 'medical_reports'
+    __table_args__ = (
+        # Serves "a user's reports, newest first" without a sort
+        Index('ix_medical_reports_user_uploaded', 'user_id', 'uploaded_at'),
+    )
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
     uploaded_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     original_filename = Column(String(255), nullable=False)
     file_type = Column(String(50), nullable=False)
-    file_data = Column(LargeBinary, nullable=True)  # Store file content
-    extracted_text = Column(Text, nullable=True)
-    analysis_results = Column(Text, nullable=True)  # JSON string of analysis
+    file_path = Column(String(512), nullable=True)  # Uploaded file on disk (content-addressed)
+    file_sha256 = Column(String(64), nullable=True, index=True)
+    # Bulky columns are deferred: loaded on attribute access, not by list queries
+    file_data = deferred(Column(LargeBinary, nullable=True))  # Legacy in-row file content
+    extracted_text = deferred(Column(Text, nullable=True))
+    analysis_results = deferred(Column(Text, nullable=True))  # JSON string of analysis
     urgency_level = Column(String(20), nullable=True)
     confidence_score = Column(Float, nullable=True)
     
@@ -106,6 +118,16 @@ class MedicalReport(Base):
 # Database configuration (kept for potential future use)
 DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///health_analyzer.db')
 
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Tune each new SQLite connection: WAL lets reads run alongside the occasional write"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")  # fsync at checkpoints, not every commit (safe with WAL)
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")  # 256 MB
+    cursor.execute("PRAGMA cache_size=-20000")  # ~20 MB page cache
+    cursor.close()
+
 def create_engine_and_session():
     """Create database engine and session factory"""
     engine = create_engine(
@@ -115,6 +137,9 @@ def create_engine_and_session():
         connect_args={'check_same_thread': False} if 'sqlite' in DATABASE_URL else {}
     )
     
+    if 'sqlite' in DATABASE_URL:
+        event.listen(engine, 'connect', _set_sqlite_pragmas)
+    
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
     return engine, SessionLocal
 
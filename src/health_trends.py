@@ -8,39 +8,40 @@ This module provides basic trend visualization capabilities.
 import streamlit as st
 
 
-class HealthTrendsDashboard:
-    """Simplified health trends dashboard without user authentication"""
-    
-    def __init__(self):
-        """Initialize health trends dashboard"""
-        pass
-    
-    def show_health_trends_dashboard(self):
-        """Display simplified health trends dashboard"""
-        st.markdown("## 📈 Health Trends Dashboard")
-        st.info("📊 **Health trends tracking is currently disabled.** The app now focuses on symptom analysis without user accounts.")
-        
-        st.markdown("""
-        ### 🔧 **What Changed:**
-        - Removed user authentication system
-        - Disabled historical data tracking
-        - Focus on individual symptom analysis sessions
-        
-        ### 🎯 **Current Features:**
-        - Real-time symptom analysis
-        - Disease prediction with confidence scores
-        - Personalized health recommendations
-        - Medical report upload and analysis
-        - Visual analysis charts
-        - PDF report generation
-        
-        ### 💡 **How to Use:**
-        1. Use the sidebar to enter your symptoms
-        2. Get instant AI-powered analysis
-        3. Review recommendations and insights
-        4. Export your results for personal records
-        """)
+# Static dashboard copy, built once at import
+_TRENDS_NOTICE = (
+    "📊 **Health trends tracking is currently disabled.** "
+    "The app now focuses on symptom analysis without user accounts."
+)
+
+_TRENDS_DETAILS = """
+### 🔧 **What Changed:**
+- Removed user authentication system
+- Disabled historical data tracking
+- Focus on individual symptom analysis sessions
+
+### 🎯 **Current Features:**
+- Real-time symptom analysis
+- Disease prediction with confidence scores
+- Personalized health recommendations
+- Medical report upload and analysis
+- Visual analysis charts
+- PDF report generation
+
+### 💡 **How to Use:**
+1. Use the sidebar to enter your symptoms
+2. Get instant AI-powered analysis
+3. Review recommendations and insights
+4. Export your results for personal records
+"""
+
+
+def show_health_trends_dashboard():
+    """Display simplified health trends dashboard"""
+    st.markdown("## 📈 Health Trends Dashboard")
+    st.info(_TRENDS_NOTICE)
+    st.markdown(_TRENDS_DETAILS)
 
 
 # Export main components
-__all__ = ['HealthTrendsDashboard']
+__all__ = ['show_health_trends_dashboard']
@@ -1,24 +1,65 @@
 import pandas as pd
 import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import LabelEncoder
 import re
 import pickle
 import os
+import hashlib
+import sklearn
+from functools import lru_cache
+
+# Fitted vectorizer/model cache, keyed by dataset content; unset disables it
+# (the pickled forest is large, ~500 MB for the bundled dataset). Entries are
+# unpickled on load, so point it only at a directory this app alone writes to.
+MODEL_CACHE_DIR = os.getenv('MODEL_CACHE_DIR')
+
+# Anything that isn't a word character or whitespace is dropped from symptom text
+_PUNCT_RE = re.compile(r'[^\w\s]')
+
+
+@lru_cache(maxsize=4096)
+def _clean_symptom_text(symptoms):
+    """Normalize one symptoms string; memoized since each query is cleaned once per model"""
+    # Convert semicolon- and comma-separated symptoms to space-separated
+    symptoms = symptoms.replace(';', ' ').replace(',', ' ')
+    # Remove special characters and normalize
+    return _PUNCT_RE.sub('', symptoms.lower().strip())
+
+
+# Dataset columns copied into each prediction
+_PREDICTION_COLUMNS = ('Disease', 'Severity', 'Precautions', 'Diet_Recommendations',
+                       'Description', 'Symptoms')
+
+
+def _top_indices(scores, top_n):
+    """Indices of the top_n highest scores, best first"""
+    # Partition out the top_n candidates, then sort only those
+    if top_n < len(scores):
+        candidates = np.argpartition(scores, -top_n)[-top_n:]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(scores[candidates])[::-1]][:top_n]
+
 
 class HealthPredictor:
     def __init__(self, data_path='data/sample_data.csv'):
         """Initialize the Health Prediction Engine"""
         self.data_path = data_path
         self.df = None
-        self.vectorizer = TfidfVectorizer(stop_words='english', ngram_range=(1, 2))
+        self.vectorizer = TfidfVectorizer(stop_words='english', ngram_range=(1, 2), norm='l2')
         self.symptom_vectors = None
+        self.term_index = None
+        self.row_classes = None
+        self.class_rows = None
+        self._columns = None
         self.model = RandomForestClassifier(n_estimators=100, random_state=42)
         self.label_encoder = LabelEncoder()
         self.load_data()
-        self.prepare_models()
+        if not self._load_cached_models():
+            self.prepare_models()
+            self._save_cached_models()
     
     def load_data(self):
         """Load health data from CSV file"""
@@ -29,19 +70,22 @@ class HealthPredictor:
             print(f"❌ Error: Could not find {self.data_path}")
             raise
     
-    def preprocess_symptoms(self, symptoms):
+    @staticmethod
+    def preprocess_symptoms(symptoms):
         """Clean and preprocess symptoms text"""
         if isinstance(symptoms, str):
-            # Convert semicolon-separated symptoms to space-separated
-            symptoms = symptoms.replace(';', ' ')
-            # Remove special characters and normalize
-            symptoms = re.sub(r'[^\w\s]', '', symptoms.lower().strip())
+            return _clean_symptom_text(symptoms)
         return symptoms
     
     def prepare_models(self):
         """Prepare TF-IDF vectorizer and ML model"""
-        # Preprocess all symptoms in dataset
-        processed_symptoms = self.df['Symptoms'].apply(self.preprocess_symptoms)
+        # Preprocess all symptoms in dataset, column-wise (same steps as preprocess_symptoms)
+        processed_symptoms = (self.df['Symptoms']
+                              .str.replace(';', ' ', regex=False)
+                              .str.replace(',', ' ', regex=False)
+                              .str.lower()
+                              .str.strip()
+                              .str.replace(_PUNCT_RE, '', regex=True))
         
         # Fit TF-IDF vectorizer
         self.symptom_vectors = self.vectorizer.fit_transform(processed_symptoms)
@@ -50,112 +94,144 @@ class HealthPredictor:
         X = self.symptom_vectors
         y = self.label_encoder.fit_transform(self.df['Disease'])
         self.model.fit(X, y)
+        self._build_indexes()
         
         print("✅ Models prepared successfully")
     
-    def calculate_similarity_scores(self, user_symptoms):
-        """Calculate similarity scores using TF-IDF and cosine similarity"""
+    def _build_indexes(self):
+        """Derive lookup structures from the fitted vectors and labels"""
+        # Term -> disease postings (inverted index) for scoring queries by their few nonzero terms
+        self.term_index = self.symptom_vectors.T.tocsr()
+        # Model class of each dataset row (several rows can share a disease)
+        self.row_classes = self.label_encoder.transform(self.df['Disease'])
+        # Dataset rows of each class, in dataset order
+        rows_by_class = np.argsort(self.row_classes, kind='stable')
+        boundaries = np.flatnonzero(np.diff(self.row_classes[rows_by_class])) + 1
+        self.class_rows = np.split(rows_by_class, boundaries)
+        # Column arrays so building a prediction is plain indexing, not a pandas row copy
+        self._columns = {column: self.df[column].to_numpy() for column in _PREDICTION_COLUMNS}
+    
+    def _vectorize(self, user_symptoms):
+        """Transform user symptoms into a TF-IDF row vector"""
         processed_input = self.preprocess_symptoms(user_symptoms)
-        user_vector = self.vectorizer.transform([processed_input])
+        return self.vectorizer.transform([processed_input])
+    
+    def calculate_similarity_scores(self, user_symptoms, user_vector=None):
+        """Calculate similarity scores using TF-IDF and cosine similarity"""
+        if user_vector is None:
+            user_vector = self._vectorize(user_symptoms)
         
-        # Calculate cosine similarity
-        similarities = cosine_similarity(user_vector, self.symptom_vectors).flatten()
+        # TF-IDF rows are already L2-normalized, so cosine similarity is a plain sparse dot
+        # product; going through the term index only visits the query's nonzero terms
+        similarities = (user_vector @ self.term_index).toarray().ravel()
         
         return similarities
     
-    def predict_diseases_similarity(self, user_symptoms, top_n=3):
+    def _prediction_from_row(self, idx, confidence):
+        """Build a prediction dict from dataset row idx and a percentage confidence"""
+        columns = self._columns
+        return {
+            'disease': columns['Disease'][idx],
+            'confidence': round(float(confidence), 2),
+            'severity': columns['Severity'][idx],
+            'precautions': columns['Precautions'][idx],
+            'diet_recommendations': columns['Diet_Recommendations'][idx],
+            'description': columns['Description'][idx],
+            'matched_symptoms': columns['Symptoms'][idx]
+        }
+    
+    def predict_diseases_similarity(self, user_symptoms, top_n=3, user_vector=None):
         """Predict diseases using similarity-based matching"""
-        similarities = self.calculate_similarity_scores(user_symptoms)
+        similarities = self.calculate_similarity_scores(user_symptoms, user_vector)
         
         # Get top matches
-        top_indices = np.argsort(similarities)[::-1][:top_n]
+        top_indices = _top_indices(similarities, top_n)
         
         predictions = []
         for idx in top_indices:
             if similarities[idx] > 0:  # Only include non-zero similarities
-                disease_info = self.df.iloc[idx].copy()
                 confidence = float(similarities[idx] * 100)  # Convert to percentage
-                
-                predictions.append({
-                    'disease': disease_info['Disease'],
-                    'confidence': round(confidence, 2),
-                    'severity': disease_info['Severity'],
-                    'precautions': disease_info['Precautions'],
-                    'diet_recommendations': disease_info['Diet_Recommendations'],
-                    'description': disease_info['Description'],
-                    'matched_symptoms': disease_info['Symptoms']
-                })
+                predictions.append(self._prediction_from_row(idx, confidence))
         
         return predictions
     
-    def predict_diseases_ml(self, user_symptoms, top_n=3):
+    def _forest_proba(self, user_vectors):
+        """Average per-tree class probabilities, one row per query row"""
+        # Same accumulation as RandomForestClassifier.predict_proba, minus joblib
+        # dispatch and per-tree input validation (trees expect float32 input)
+        X = user_vectors.astype(np.float32)
+        probabilities = np.zeros((X.shape[0], len(self.model.classes_)))
+        for tree in self.model.estimators_:
+            probabilities += tree.predict_proba(X, check_input=False)
+        probabilities /= len(self.model.estimators_)
+        return probabilities
+    
+    def predict_diseases_ml(self, user_symptoms, top_n=3, user_vector=None):
         """Predict diseases using Machine Learning model"""
-        processed_input = self.preprocess_symptoms(user_symptoms)
-        user_vector = self.vectorizer.transform([processed_input])
+        if user_vector is None:
+            user_vector = self._vectorize(user_symptoms)
         
         # Get prediction probabilities
-        probabilities = self.model.predict_proba(user_vector)[0]
+        probabilities = self._forest_proba(user_vector)[0]
         
         # Get top predictions
-        top_indices = np.argsort(probabilities)[::-1][:top_n]
+        top_indices = _top_indices(probabilities, top_n)
         
         predictions = []
         for idx in top_indices:
             if probabilities[idx] > 0.01:  # Only include predictions with >1% confidence
-                disease_name = self.label_encoder.inverse_transform([idx])[0]
-                disease_info = self.df[self.df['Disease'] == disease_name].iloc[0]
+                # Describe the disease with its first dataset row
                 confidence = float(probabilities[idx] * 100)
-                
-                predictions.append({
-                    'disease': disease_name,
-                    'confidence': round(confidence, 2),
-                    'severity': disease_info['Severity'],
-                    'precautions': disease_info['Precautions'],
-                    'diet_recommendations': disease_info['Diet_Recommendations'],
-                    'description': disease_info['Description'],
-                    'matched_symptoms': disease_info['Symptoms']
-                })
+                predictions.append(self._prediction_from_row(self.class_rows[idx][0], confidence))
         
         return predictions
     
     def hybrid_prediction(self, user_symptoms, top_n=3):
         """Combine similarity-based and ML predictions for better results"""
-        # Get predictions from both methods
-        similarity_predictions = self.predict_diseases_similarity(user_symptoms, top_n)
-        ml_predictions = self.predict_diseases_ml(user_symptoms, top_n)
-        
-        # Combine and weight the predictions
-        combined_scores = {}
-        
-        # Weight similarity-based predictions (60% weight)
-        for pred in similarity_predictions:
-            disease = pred['disease']
-            combined_scores[disease] = {
-                'info': pred,
-                'score': pred['confidence'] * 0.6
-            }
-        
-        # Weight ML-based predictions (40% weight)
-        for pred in ml_predictions:
-            disease = pred['disease']
-            if disease in combined_scores:
-                combined_scores[disease]['score'] += pred['confidence'] * 0.4
-            else:
-                combined_scores[disease] = {
-                    'info': pred,
-                    'score': pred['confidence'] * 0.4
-                }
-        
-        # Sort by combined score and return top predictions
-        sorted_predictions = sorted(combined_scores.items(), 
-                                  key=lambda x: x[1]['score'], 
-                                  reverse=True)[:top_n]
+        # Score every disease with both methods, sharing one TF-IDF transform
+        user_vector = self._vectorize(user_symptoms)
+        similarities = self.calculate_similarity_scores(user_symptoms, user_vector)
+        probabilities = self._forest_proba(user_vector)[0]
+        
+        return self._combine_predictions(similarities, probabilities, top_n)
+    
+    def predict_batch(self, symptoms_list, top_n=3):
+        """Hybrid predictions for several symptom strings, scored together"""
+        if not symptoms_list:
+            return []
+        
+        processed_inputs = [self.preprocess_symptoms(symptoms) for symptoms in symptoms_list]
+        user_vectors = self.vectorizer.transform(processed_inputs)
+        
+        # One sparse product and one forest pass for the whole batch
+        similarities = (user_vectors @ self.term_index).toarray()
+        probabilities = self._forest_proba(user_vectors)
+        
+        return [self._combine_predictions(row_similarities, row_probabilities, top_n)
+                for row_similarities, row_probabilities in zip(similarities, probabilities)]
+    
+    def _combine_predictions(self, similarities, probabilities, top_n):
+        """Rank diseases by weighted similarity and ML scores for one query"""
+        # Best similarity per disease class, since a disease can have several rows
+        class_similarities = np.zeros(len(probabilities))
+        np.maximum.at(class_similarities, self.row_classes, similarities)
+        # Same cut-off as predict_diseases_ml: ignore classes under 1% probability
+        probabilities = np.where(probabilities > 0.01, probabilities, 0.0)
+        
+        # Weight similarity-based (60%) and ML-based (40%) scores, as percentages
+        combined_scores = (class_similarities * 0.6 + probabilities * 0.4) * 100
         
         final_predictions = []
-        for disease, data in sorted_predictions:
-            prediction = data['info'].copy()
-            prediction['confidence'] = round(data['score'], 2)
-            final_predictions.append(prediction)
+        for class_idx in _top_indices(combined_scores, top_n):
+            if combined_scores[class_idx] <= 0:
+                break
+            # Describe the disease with its best-matching row (first row if none matched)
+            rows = self.class_rows[class_idx]
+            row_idx = rows[np.argmax(similarities[rows])]
+            # Round each method's percentage first, as the per-method predictions report them
+            confidence = (round(float(class_similarities[class_idx] * 100), 2) * 0.6
+                          + round(float(probabilities[class_idx] * 100), 2) * 0.4)
+            final_predictions.append(self._prediction_from_row(row_idx, confidence))
         
         return final_predictions
     
@@ -174,6 +250,56 @@ class HealthPredictor:
         
         return warnings.get(highest_severity, "Please monitor your symptoms carefully.")
     
+    def _model_cache_path(self):
+        """Cache file for this dataset and model configuration, or None when caching is off"""
+        if not MODEL_CACHE_DIR:
+            return None
+        key = hashlib.blake2b(digest_size=16)
+        with open(self.data_path, 'rb') as f:
+            key.update(f.read())
+        # Refit when hyperparameters or the sklearn version change
+        key.update(repr((sklearn.__version__, self.vectorizer.get_params(),
+                         self.model.get_params())).encode('utf-8'))
+        return os.path.join(MODEL_CACHE_DIR, f"{key.hexdigest()}.pkl")
+    
+    def _load_cached_models(self):
+        """Restore fitted artifacts for unchanged data; returns False on a cache miss"""
+        path = self._model_cache_path()
+        if path is None or not os.path.exists(path):
+            return False
+        try:
+            with open(path, 'rb') as f:
+                vectorizer, model, label_encoder, symptom_vectors = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError,
+                ValueError, TypeError) as e:
+            # Truncated or incompatible cache entry: refit and overwrite it
+            print(f"⚠️ Ignoring unreadable model cache {path}: {e}")
+            return False
+        self.vectorizer, self.model, self.label_encoder, self.symptom_vectors = (
+            vectorizer, model, label_encoder, symptom_vectors
+        )
+        self._build_indexes()
+        print("✅ Models loaded from cache")
+        return True
+    
+    def _save_cached_models(self):
+        """Persist fitted artifacts so the next start with the same data skips fitting"""
+        path = self._model_cache_path()
+        if path is None:
+            return
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(MODEL_CACHE_DIR, exist_ok=True)
+            # Write aside and rename, so readers never see a partial file
+            with open(tmp_path, 'wb') as f:
+                pickle.dump((self.vectorizer, self.model, self.label_encoder, self.symptom_vectors),
+                            f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️ Could not write model cache {path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    
     def save_model(self, model_path='models/'):
         """Save trained models"""
         os.makedirs(model_path, exist_ok=True)
@@ -218,9 +344,8 @@ def test_prediction_engine():
         "stomach pain, diarrhea, vomiting"
     ]
     
-    for symptoms in test_cases:
+    for symptoms, predictions in zip(test_cases, predictor.predict_batch(test_cases)):
         print(f"🔍 Testing symptoms: {symptoms}")
-        predictions = predictor.hybrid_prediction(symptoms)
         warning = predictor.get_severity_warning(predictions)
         
         print("📋 Top Predictions:")
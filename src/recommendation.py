@@ -36,6 +36,44 @@ class HealthRecommendationSystem:
             "🌡️ Monitor your symptoms and track any changes",
             "📱 Keep emergency contacts readily available"
         ]
+        
+        self.general_warning_signs = (
+            "🚨 Difficulty breathing or shortness of breath",
+            "🚨 Chest pain or pressure",
+            "🚨 High fever (>103°F/39.4°C)",
+            "🚨 Severe dehydration",
+            "🚨 Persistent vomiting",
+            "🚨 Severe abdominal pain",
+            "🚨 Signs of infection (spreading redness, pus)",
+            "🚨 Loss of consciousness or confusion"
+        )
+        
+        # (disease name keywords, self-care tips) rules, checked in order
+        self.condition_self_care_tips = (
+            (('cold', 'flu'), (
+                "🤧 Use a humidifier or breathe steam from a hot shower",
+                "🍵 Drink warm beverages like tea with honey",
+                "🧊 Gargle with warm salt water for sore throat"
+            )),
+            (('headache', 'migraine'), (
+                "🌑 Rest in a dark, quiet room",
+                "❄️ Apply cold or warm compress to head/neck",
+                "💆‍♀️ Try gentle neck and shoulder massage"
+            )),
+            (('stomach', 'gastro'), (
+                "🍚 Follow BRAT diet (Bananas, Rice, Applesauce, Toast)",
+                "💧 Sip clear fluids frequently",
+                "🌡️ Use heating pad on stomach for comfort"
+            ))
+        )
+        
+        # (disease name keywords, warning) rules, checked in order
+        self.condition_warning_signs = (
+            (('heart', 'cardiac'), "🚨 Chest pain radiating to arm, jaw, or back"),
+            (('stroke',), "🚨 Sudden weakness, speech difficulty, or vision problems"),
+            (('asthma',), "🚨 Severe difficulty breathing or wheezing"),
+            (('diabetes',), "🚨 Extremely high or low blood sugar levels")
+        )
     
     def generate_severity_assessment(self, predictions):
         """Generate detailed severity assessment and recommendations"""
@@ -71,7 +109,7 @@ class HealthRecommendationSystem:
         recommendations = [rec.strip() for rec in recommendation_text.split(',')]
         return [rec for rec in recommendations if rec]  # Remove empty strings
     
-    def generate_lifestyle_recommendations(self, predictions):
+    def generate_lifestyle_recommendations(self, predictions, severity_assessment=None):
         """Generate comprehensive lifestyle recommendations"""
         if not predictions:
             return []
@@ -86,7 +124,8 @@ class HealthRecommendationSystem:
                     lifestyle_recs.append(f"⚠️ {precaution}")
         
         # Add general health tips based on severity
-        severity_assessment = self.generate_severity_assessment(predictions)
+        if severity_assessment is None:
+            severity_assessment = self.generate_severity_assessment(predictions)
         
         if severity_assessment['overall_severity'] in ['Mild', 'Moderate']:
             lifestyle_recs.extend(self.general_health_tips[:4])
@@ -128,79 +167,47 @@ class HealthRecommendationSystem:
         if not predictions:
             return []
         
-        general_warning_signs = [
-            "🚨 Difficulty breathing or shortness of breath",
-            "🚨 Chest pain or pressure",
-            "🚨 High fever (>103°F/39.4°C)",
-            "🚨 Severe dehydration",
-            "🚨 Persistent vomiting",
-            "🚨 Severe abdominal pain",
-            "🚨 Signs of infection (spreading redness, pus)",
-            "🚨 Loss of consciousness or confusion"
-        ]
-        
-        # Add specific warning signs based on predicted conditions
-        specific_warnings = []
+        # Condition-specific warnings first (first matching rule per prediction),
+        # then the general signs; the dict keeps insertion order and drops duplicates
+        warnings = {}
         for pred in predictions:
             disease = pred['disease'].lower()
-            
-            if 'heart' in disease or 'cardiac' in disease:
-                specific_warnings.append("🚨 Chest pain radiating to arm, jaw, or back")
-            elif 'stroke' in disease:
-                specific_warnings.append("🚨 Sudden weakness, speech difficulty, or vision problems")
-            elif 'asthma' in disease:
-                specific_warnings.append("🚨 Severe difficulty breathing or wheezing")
-            elif 'diabetes' in disease:
-                specific_warnings.append("🚨 Extremely high or low blood sugar levels")
-        
-        # Combine and return unique warnings
-        all_warnings = specific_warnings + general_warning_signs[:5]
-        return list(dict.fromkeys(all_warnings))  # Remove duplicates while preserving order
+            for keywords, warning in self.condition_warning_signs:
+                if any(keyword in disease for keyword in keywords):
+                    warnings[warning] = None
+                    break
+        
+        warnings.update(dict.fromkeys(self.general_warning_signs[:5]))
+        return list(warnings)
     
     def generate_self_care_tips(self, predictions):
         """Generate self-care tips based on predicted conditions"""
         if not predictions:
             return []
         
-        self_care_tips = []
+        # The dict keeps insertion order and drops duplicate tips
+        self_care_tips = {}
         
         for pred in predictions:
-            disease = pred['disease'].lower()
-            severity = pred['severity']
-            
-            # Add condition-specific self-care tips
-            if 'cold' in disease or 'flu' in disease:
-                self_care_tips.extend([
-                    "🤧 Use a humidifier or breathe steam from a hot shower",
-                    "🍵 Drink warm beverages like tea with honey",
-                    "🧊 Gargle with warm salt water for sore throat"
-                ])
-            elif 'headache' in disease or 'migraine' in disease:
-                self_care_tips.extend([
-                    "🌑 Rest in a dark, quiet room",
-                    "❄️ Apply cold or warm compress to head/neck",
-                    "💆‍♀️ Try gentle neck and shoulder massage"
-                ])
-            elif 'stomach' in disease or 'gastro' in disease:
-                self_care_tips.extend([
-                    "🍚 Follow BRAT diet (Bananas, Rice, Applesauce, Toast)",
-                    "💧 Sip clear fluids frequently",
-                    "🌡️ Use heating pad on stomach for comfort"
-                ])
-            
             # Only include self-care for mild to moderate conditions
-            if severity == 'Severe':
-                self_care_tips = ["⚠️ Seek immediate medical attention - self-care not appropriate for severe conditions"]
-                break
+            if pred['severity'] == 'Severe':
+                return ["⚠️ Seek immediate medical attention - self-care not appropriate for severe conditions"]
+            
+            # Add condition-specific self-care tips (first matching rule)
+            disease = pred['disease'].lower()
+            for keywords, tips in self.condition_self_care_tips:
+                if any(keyword in disease for keyword in keywords):
+                    self_care_tips.update(dict.fromkeys(tips))
+                    break
         
-        # Remove duplicates
-        return list(dict.fromkeys(self_care_tips))
+        return list(self_care_tips)
     
-    def generate_followup_recommendations(self, predictions):
+    def generate_followup_recommendations(self, predictions, severity_assessment=None):
         """Generate follow-up care recommendations"""
         followup_recs = []
         
-        severity_assessment = self.generate_severity_assessment(predictions)
+        if severity_assessment is None:
+            severity_assessment = self.generate_severity_assessment(predictions)
         
         if severity_assessment['overall_severity'] == 'Severe':
             followup_recs = [
@@ -239,11 +246,11 @@ class HealthRecommendationSystem:
             'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             'input_symptoms': user_symptoms,
             'severity_assessment': severity_assessment,
-            'lifestyle_recommendations': self.generate_lifestyle_recommendations(predictions),
+            'lifestyle_recommendations': self.generate_lifestyle_recommendations(predictions, severity_assessment),
             'dietary_recommendations': self.generate_dietary_recommendations(predictions),
             'self_care_tips': self.generate_self_care_tips(predictions),
             'warning_signs': self.generate_warning_signs(predictions),
-            'followup_recommendations': self.generate_followup_recommendations(predictions),
+            'followup_recommendations': self.generate_followup_recommendations(predictions, severity_assessment),
             'disclaimer': self._generate_disclaimer()
         }
         
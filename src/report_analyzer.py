@@ -11,35 +11,67 @@ This module handles the analysis of uploaded medical reports including:
 import io
 import re
 import os
+import string
 import streamlit as st
 from typing import Dict, List, Optional, Tuple
 import base64
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from importlib.util import find_spec
+
+# The optional backends are only looked up here; each one is imported by the
+# code that uses it, so rendering the upload page does not load them
 
 # For PDF processing
-try:
-    import PyPDF2
-    PDF_AVAILABLE = True
-except ImportError:
-    PDF_AVAILABLE = False
+PDF_AVAILABLE = find_spec('PyPDF2') is not None
 
 # For image processing and OCR
-try:
-    from PIL import Image
-    import pytesseract
-    OCR_AVAILABLE = True
-except ImportError:
-    OCR_AVAILABLE = False
+OCR_AVAILABLE = find_spec('PIL') is not None and find_spec('pytesseract') is not None
 
 # For advanced NLP
-try:
-    import nltk
-    from nltk.tokenize import sent_tokenize, word_tokenize
-    from nltk.corpus import stopwords
-    from nltk.stem import WordNetLemmatizer
-    NLTK_AVAILABLE = True
-except ImportError:
-    NLTK_AVAILABLE = False
+NLTK_AVAILABLE = find_spec('nltk') is not None
+
+# NLTK data is fetched once per process, not per analyzer
+_nltk_ready = False
+_nltk_lock = threading.Lock()
+
+def _ensure_nltk_data():
+    """Download the NLTK data used by the analyzer, once per process"""
+    global _nltk_ready
+    if not _nltk_ready:
+        with _nltk_lock:
+            if not _nltk_ready:
+                import nltk
+                # A failed download is retried by the next analyzer
+                _nltk_ready = all([
+                    nltk.download('punkt', quiet=True),
+                    nltk.download('stopwords', quiet=True),
+                    nltk.download('wordnet', quiet=True)
+                ])
+
+# Whitespace runs collapsed by preprocess_text
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Characters preprocess_text keeps: letters, digits, spaces and medical notation.
+# Non-ASCII is dropped by an ASCII encode first, so the table only covers ASCII.
+_KEPT_CHARS = frozenset(string.ascii_letters + string.digits + ' .,;:()/%-')
+_DROP_SPECIAL_CHARS = str.maketrans('', '', ''.join(
+    chr(code) for code in range(128) if chr(code) not in _KEPT_CHARS
+))
+
+# Longest side, in pixels, of an image handed to tesseract
+_OCR_MAX_SIDE = 2000
+
+# Common lab value patterns, matched against lowercased text
+_NUMERICAL_PATTERNS = {
+    'blood_pressure': re.compile(r'bp:?\s*(\d{2,3})/?(\d{2,3})'),
+    'heart_rate': re.compile(r'hr:?\s*(\d{2,3})\s*bpm'),
+    'temperature': re.compile(r'temp:?\s*(\d{2,3}\.?\d*)\s*[cf]'),
+    'glucose': re.compile(r'glucose:?\s*(\d{2,4})\s*mg/dl'),
+    'hemoglobin': re.compile(r'h[bg]:?\s*(\d{1,2}\.?\d*)\s*g/dl'),
+    'cholesterol': re.compile(r'cholesterol:?\s*(\d{2,4})\s*mg/dl')
+}
 
 
 class MedicalReportAnalyzer:
@@ -51,13 +83,16 @@ class MedicalReportAnalyzer:
         """Initialize the medical report analyzer"""
         self.medical_keywords = self._load_medical_keywords()
         self.critical_findings = self._load_critical_findings()
+        self._critical_findings_re = re.compile(
+            '|'.join(re.escape(word) for word in self.critical_findings)
+        )
         
         # Initialize NLTK components if available
         if NLTK_AVAILABLE:
             try:
-                nltk.download('punkt', quiet=True)
-                nltk.download('stopwords', quiet=True)
-                nltk.download('wordnet', quiet=True)
+                from nltk.corpus import stopwords
+                from nltk.stem import WordNetLemmatizer
+                _ensure_nltk_data()
                 self.lemmatizer = WordNetLemmatizer()
                 self.stop_words = set(stopwords.words('english'))
             except:
@@ -116,11 +151,9 @@ class MedicalReportAnalyzer:
             return "PDF processing not available. Please install PyPDF2."
         
         try:
+            import PyPDF2
             pdf_reader = PyPDF2.PdfReader(pdf_file)
-            text = ""
-            
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\\n"
+            text = "\n".join(page.extract_text() or "" for page in pdf_reader.pages)
             
             return text.strip()
         
@@ -133,21 +166,41 @@ class MedicalReportAnalyzer:
             return "OCR processing not available. Please install PIL and pytesseract."
         
         try:
+            from PIL import Image, ImageSequence
+            import pytesseract
             image = Image.open(image_file)
-            text = pytesseract.image_to_string(image)
+            n_frames = getattr(image, 'n_frames', 1)
+            
+            if n_frames == 1:
+                text = pytesseract.image_to_string(self._prepare_image_for_ocr(image))
+            else:
+                # Multi-page TIFFs: each frame runs in its own tesseract process
+                frames = [self._prepare_image_for_ocr(frame) for frame in ImageSequence.Iterator(image)]
+                with ThreadPoolExecutor(max_workers=min(n_frames, os.cpu_count() or 1)) as executor:
+                    text = "\n".join(executor.map(pytesseract.image_to_string, frames))
+            
             return text.strip()
         
         except Exception as e:
             return f"Error extracting text from image: {str(e)}"
     
+    @staticmethod
+    def _prepare_image_for_ocr(image):
+        """Grayscale, downscale and contrast-stretch an image so tesseract has less to do"""
+        from PIL import Image, ImageOps
+        image = image.convert('L')
+        if max(image.size) > _OCR_MAX_SIDE:
+            image.thumbnail((_OCR_MAX_SIDE, _OCR_MAX_SIDE), Image.LANCZOS)
+        return ImageOps.autocontrast(image)
+    
     def preprocess_text(self, text: str) -> str:
         """Clean and preprocess the extracted text"""
         # Remove extra whitespace and normalize
-        text = re.sub(r'\\s+', ' ', text)
+        text = _WHITESPACE_RE.sub(' ', text)
         text = text.strip()
         
         # Remove special characters but keep medical notation
-        text = re.sub(r'[^a-zA-Z0-9\\s\\.,;:()/%-]', '', text)
+        text = text.encode('ascii', 'ignore').decode('ascii').translate(_DROP_SPECIAL_CHARS)
         
         return text
     
@@ -165,29 +218,31 @@ class MedicalReportAnalyzer:
         
         text_lower = text.lower()
         
+        # Split and lowercase the sentences once, not once per matching keyword
+        sentences = [sentence.strip() for sentence in text.split('.')]
+        sentences_lower = [sentence.lower() for sentence in sentences]
+        
+        # Collect into dicts: ordered like the report, without duplicates
+        found = {key: {} for key in extracted_info}
+        
         # Extract information for each category
         for category, keywords in self.medical_keywords.items():
             for keyword in keywords:
                 if keyword in text_lower:
-                    # Extract the sentence containing the keyword
-                    sentences = text.split('.')
-                    for sentence in sentences:
-                        if keyword.lower() in sentence.lower():
-                            extracted_info[category].append(sentence.strip())
+                    # Extract the first sentence containing the keyword
+                    for sentence, sentence_lower in zip(sentences, sentences_lower):
+                        if keyword in sentence_lower:
+                            found[category][sentence] = None
                             break
         
-        # Look for critical findings
-        for critical_word in self.critical_findings:
-            if critical_word in text_lower:
-                # Find sentences with critical findings
-                sentences = text.split('.')
-                for sentence in sentences:
-                    if critical_word.lower() in sentence.lower():
-                        extracted_info['critical_findings'].append(sentence.strip())
+        # Look for critical findings: one scan per sentence for all words at once
+        critical_search = self._critical_findings_re.search
+        for sentence, sentence_lower in zip(sentences, sentences_lower):
+            if critical_search(sentence_lower):
+                found['critical_findings'][sentence] = None
         
-        # Remove duplicates
         for key in extracted_info:
-            extracted_info[key] = list(set(extracted_info[key]))
+            extracted_info[key] = list(found[key])
         
         return extracted_info
     
@@ -195,27 +250,16 @@ class MedicalReportAnalyzer:
         """Extract numerical values from medical reports"""
         numerical_data = {}
         
-        # Common lab value patterns
-        patterns = {
-            'blood_pressure': r'bp:?\\s*(\\d{2,3})/?(\\d{2,3})',
-            'heart_rate': r'hr:?\\s*(\\d{2,3})\\s*bpm',
-            'temperature': r'temp:?\\s*(\\d{2,3}\\.?\\d*)\\s*[cf]',
-            'glucose': r'glucose:?\\s*(\\d{2,4})\\s*mg/dl',
-            'hemoglobin': r'h[bg]:?\\s*(\\d{1,2}\\.?\\d*)\\s*g/dl',
-            'cholesterol': r'cholesterol:?\\s*(\\d{2,4})\\s*mg/dl'
-        }
-        
         text_lower = text.lower()
         
-        for key, pattern in patterns.items():
-            matches = re.findall(pattern, text_lower)
-            if matches:
-                if key == 'blood_pressure' and len(matches[0]) == 2:
-                    numerical_data[key] = f"{matches[0][0]}/{matches[0][1]}"
-                elif isinstance(matches[0], tuple):
-                    numerical_data[key] = matches[0][0]
+        # Only the first reading of each value is reported
+        for key, pattern in _NUMERICAL_PATTERNS.items():
+            match = pattern.search(text_lower)
+            if match:
+                if key == 'blood_pressure':
+                    numerical_data[key] = f"{match.group(1)}/{match.group(2)}"
                 else:
-                    numerical_data[key] = matches[0]
+                    numerical_data[key] = match.group(1)
         
         return numerical_data
     
@@ -298,17 +342,37 @@ class MedicalReportAnalyzer:
             return {'error': 'No file uploaded'}
         
         file_type = uploaded_file.type
-        file_name = uploaded_file.name
+        
+        # Identical uploads are only parsed and analyzed once
+        try:
+            analysis = _analyze_report_content(self, uploaded_file.getvalue(), file_type)
+        except _ReportAnalysisError as e:
+            return {'error': str(e)}
+        
+        # Compile final analysis
+        analysis_result = {
+            'file_info': {
+                'name': uploaded_file.name,
+                'type': file_type,
+                'analysis_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            }
+        }
+        analysis_result.update(analysis)
+        
+        return analysis_result
+    
+    def analyze_report_content(self, content: bytes, file_type: str) -> Dict[str, any]:
+        """Extract and analyze the text of a report from its raw file bytes"""
         
         # Extract text based on file type
         if file_type == 'application/pdf':
             if not PDF_AVAILABLE:
                 return {'error': 'PDF processing not available. Please install PyPDF2.'}
-            extracted_text = self.extract_text_from_pdf(uploaded_file)
+            extracted_text = self.extract_text_from_pdf(io.BytesIO(content))
         elif file_type.startswith('image/'):
             if not OCR_AVAILABLE:
                 return {'error': 'Image processing not available. Please install PIL and pytesseract.'}
-            extracted_text = self.extract_text_from_image(uploaded_file)
+            extracted_text = self.extract_text_from_image(io.BytesIO(content))
         else:
             return {'error': f'Unsupported file type: {file_type}'}
         
@@ -331,32 +395,16 @@ class MedicalReportAnalyzer:
         # Generate summary
         summary = self.generate_report_summary(extracted_info, numerical_data)
         
-        # Compile final analysis
-        analysis_result = {
-            'file_info': {
-                'name': file_name,
-                'type': file_type,
-                'analysis_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            },
+        return {
             'extracted_text': clean_text[:1000] + '...' if len(clean_text) > 1000 else clean_text,
             'summary': summary,
             'confidence_score': self._calculate_confidence_score(extracted_info, clean_text)
         }
-        
-        return analysis_result
     
     def _calculate_confidence_score(self, extracted_info: Dict, text: str) -> float:
         """Calculate confidence score for the analysis"""
-        score = 0.0
-        
-        # Base score for text length
-        if len(text) > 100:
-            score += 0.3
-        
-        # Score for extracted information
-        for category, items in extracted_info.items():
-            if items:
-                score += 0.1
+        # Base score for text length, plus 0.1 per category with extracted information
+        score = 0.3 * (len(text) > 100) + 0.1 * sum(1 for items in extracted_info.values() if items)
         
         # Cap at 1.0
         return min(1.0, score)
@@ -464,6 +512,26 @@ class MedicalReportAnalyzer:
         return viz_data
 
 
+@st.cache_resource
+def get_report_analyzer():
+    """Create the report analyzer once and reuse it across reruns and sessions"""
+    return MedicalReportAnalyzer()
+
+
+class _ReportAnalysisError(Exception):
+    """Analysis failure carried out of the cached analysis function"""
+
+
+@st.cache_data(max_entries=128, show_spinner=False)
+def _analyze_report_content(_analyzer, content, file_type):
+    """Analyze report bytes, cached on the file content across reruns and sessions"""
+    analysis = _analyzer.analyze_report_content(content, file_type)
+    if 'error' in analysis:
+        # Raised so the failure isn't cached; a re-upload of the same file retries
+        raise _ReportAnalysisError(analysis['error'])
+    return analysis
+
+
 def create_report_upload_interface():
     """Create the Streamlit interface for medical report upload and analysis"""
     
@@ -494,8 +562,8 @@ def create_report_upload_interface():
         if st.button("🔬 Analyze Report", type="primary"):
             with st.spinner("Analyzing your medical report..."):
                 
-                # Initialize analyzer
-                analyzer = MedicalReportAnalyzer()
+                # Shared analyzer, built on first use
+                analyzer = get_report_analyzer()
                 
                 # Analyze the report
                 analysis_result = analyzer.analyze_uploaded_report(uploaded_file)
@@ -710,4 +778,4 @@ def display_report_analysis_results():
 
 
 # Export the main functions
-__all__ = ['MedicalReportAnalyzer', 'create_report_upload_interface', 'display_report_analysis_results']
+__all__ = ['MedicalReportAnalyzer', 'get_report_analyzer', 'create_report_upload_interface', 'display_report_analysis_results']
@@ -3,18 +3,52 @@ import seaborn as sns
 import plotly.graph_objects as go
 import plotly.express as px
 from plotly.subplots import make_subplots
-import pandas as pd
 import numpy as np
 from wordcloud import WordCloud
 import io
 import base64
+from collections import Counter
+from functools import lru_cache
+
+# Risk score multiplier per severity (anything else counts as mild)
+SEVERITY_WEIGHT = {'Mild': 1, 'Moderate': 2, 'Severe': 3}
+
+def _unpack_predictions(predictions):
+    """Diseases, confidences and severities of the predictions, in one pass"""
+    columns = zip(*((pred['disease'], pred['confidence'], pred['severity']) for pred in predictions))
+    return tuple(list(column) for column in columns)
+
+@lru_cache(maxsize=64)
+def _generate_wordcloud(text):
+    """Lay out the symptom word cloud for a text; the fitted layout is small, the rendering is not cached"""
+    return WordCloud(width=1200, height=600, 
+                     min_font_size=16,
+                     max_font_size=80,
+                     prefer_horizontal=0.8,
+                     collocations=False,
+                     margin=20,
+                     random_state=42,
+                     background_color='white',
+                     colormap="Set3",
+                     max_words=25,
+                     relative_scaling=0.8).generate(text)
+
+@lru_cache(maxsize=1)
+def _apply_plot_style():
+    """Set the global matplotlib/seaborn style once per process, not per instance"""
+    plt.style.use('seaborn-v0_8')
+    sns.set_palette("husl")
+
+def _count_severities(severities):
+    """Severity levels and their counts, most common first (ties in first-seen order)"""
+    counts = Counter(severities).most_common()
+    return [level for level, _ in counts], [total for _, total in counts]
 
 class HealthVisualization:
     def __init__(self):
         """Initialize the Health Visualization System"""
         # Set styling for matplotlib/seaborn
-        plt.style.use('seaborn-v0_8')
-        sns.set_palette("husl")
+        _apply_plot_style()
         
         # Color schemes for different severity levels
         self.severity_colors = {
@@ -30,47 +64,41 @@ class HealthVisualization:
         if not predictions:
             return None
         
-        diseases = [pred['disease'] for pred in predictions]
-        confidences = [pred['confidence'] for pred in predictions]
-        severities = [pred['severity'] for pred in predictions]
-        
-        # Create colors based on severity
-        colors = [self.severity_colors.get(severity, '#6c757d') for severity in severities]
-        
-        fig, ax = plt.subplots(figsize=(12, 8))
-        
-        # Create horizontal bar chart
-        bars = ax.barh(diseases, confidences, color=colors, alpha=0.7, edgecolor='black', linewidth=1)
-        
-        # Customize the chart
-        ax.set_xlabel('Confidence (%)', fontsize=12, fontweight='bold')
-        ax.set_ylabel('Predicted Diseases', fontsize=12, fontweight='bold')
-        ax.set_title(title, fontsize=16, fontweight='bold', pad=20)
-        
-        # Add confidence values on bars
-        for i, (bar, conf) in enumerate(zip(bars, confidences)):
-            ax.text(bar.get_width() + 1, bar.get_y() + bar.get_height()/2, 
-                   f'{conf:.1f}%', va='center', fontweight='bold')
+        diseases, confidences, severities = _unpack_predictions(predictions)
         
-        # Add severity legend
-        severity_handles = []
-        for severity, color in self.severity_colors.items():
-            if severity in severities:
-                severity_handles.append(plt.Rectangle((0,0),1,1, facecolor=color, alpha=0.7, label=severity))
+        # One trace per severity, so each legend entry is a real series
+        groups = {}
+        for i, severity in enumerate(severities):
+            groups.setdefault(severity if severity in self.severity_colors else None, []).append(i)
         
-        if severity_handles:
-            ax.legend(handles=severity_handles, title='Severity Level', 
-                     loc='lower right', frameon=True, fancybox=True, shadow=True)
-        
-        # Customize grid and spines
-        ax.grid(True, alpha=0.3, axis='x')
-        ax.spines['top'].set_visible(False)
-        ax.spines['right'].set_visible(False)
+        fig = go.Figure()
+        for severity in [*self.severity_colors, None]:
+            if severity not in groups:
+                continue
+            rows = groups[severity]
+            fig.add_trace(go.Bar(
+                x=[confidences[i] for i in rows],
+                y=[diseases[i] for i in rows],
+                orientation='h',
+                marker=dict(color=self.severity_colors.get(severity, '#6c757d'), opacity=0.7,
+                            line=dict(color='black', width=1)),
+                text=[f'{confidences[i]:.1f}%' for i in rows],
+                textposition='outside',
+                name=severity or 'Other',
+                showlegend=severity is not None
+            ))
         
-        # Set x-axis limit
-        ax.set_xlim(0, max(confidences) * 1.2)
+        fig.update_layout(
+            title={'text': title, 'x': 0.5, 'xanchor': 'center', 'font': {'size': 16}},
+            xaxis=dict(title='Confidence (%)', range=[0, max(confidences) * 1.2], showgrid=True),
+            # Keep the bars in prediction order regardless of which trace they are in
+            yaxis=dict(title='Predicted Diseases', autorange='reversed',
+                       categoryorder='array', categoryarray=list(diseases)),
+            barmode='overlay',
+            legend=dict(title='Severity Level'),
+            height=500
+        )
         
-        plt.tight_layout()
         return fig
     
     def create_confidence_pie_chart(self, predictions, title="Disease Probability Distribution"):
@@ -78,39 +106,30 @@ class HealthVisualization:
         if not predictions:
             return None
         
-        diseases = [pred['disease'] for pred in predictions]
-        confidences = [pred['confidence'] for pred in predictions]
-        severities = [pred['severity'] for pred in predictions]
+        diseases, confidences, severities = _unpack_predictions(predictions)
         
         # Create colors based on severity
         colors = [self.severity_colors.get(severity, '#6c757d') for severity in severities]
         
-        fig, ax = plt.subplots(figsize=(10, 8))
-        
-        # Create pie chart
-        wedges, texts, autotexts = ax.pie(confidences, labels=diseases, colors=colors, 
-                                         autopct='%1.1f%%', startangle=90,
-                                         explode=[0.1 if i == 0 else 0 for i in range(len(diseases))],
-                                         shadow=True)
-        
-        # Customize text
-        for autotext in autotexts:
-            autotext.set_color('white')
-            autotext.set_fontweight('bold')
-            autotext.set_fontsize(10)
-        
-        for text in texts:
-            text.set_fontsize(12)
-            text.set_fontweight('bold')
-        
-        ax.set_title(title, fontsize=16, fontweight='bold', pad=20)
+        fig = go.Figure(go.Pie(
+            labels=[f"{disease} ({severity})" for disease, severity in zip(diseases, severities)],
+            values=confidences,
+            text=diseases,
+            marker=dict(colors=colors),
+            textinfo='text+percent',
+            texttemplate='%{text}<br>%{percent:.1%}',
+            pull=[0.1 if i == 0 else 0 for i in range(len(diseases))],
+            sort=False,
+            direction='clockwise',
+            rotation=90
+        ))
         
-        # Add severity information in legend
-        legend_labels = [f"{disease} ({severity})" for disease, severity in zip(diseases, severities)]
-        ax.legend(wedges, legend_labels, title="Diseases (Severity)", 
-                 loc="center left", bbox_to_anchor=(1, 0, 0.5, 1))
+        fig.update_layout(
+            title={'text': title, 'x': 0.5, 'xanchor': 'center', 'font': {'size': 16}},
+            legend=dict(title='Diseases (Severity)'),
+            height=500
+        )
         
-        plt.tight_layout()
         return fig
     
     def create_interactive_confidence_chart(self, predictions):
@@ -118,9 +137,7 @@ class HealthVisualization:
         if not predictions:
             return None
         
-        diseases = [pred['disease'] for pred in predictions]
-        confidences = [pred['confidence'] for pred in predictions]
-        severities = [pred['severity'] for pred in predictions]
+        diseases, confidences, severities = _unpack_predictions(predictions)
         descriptions = [pred.get('description', 'No description available') for pred in predictions]
         
         # Create color mapping for severities
@@ -154,22 +171,11 @@ class HealthVisualization:
             xaxis_title='Predicted Diseases',
             yaxis_title='Confidence (%)',
             font=dict(size=12),
-            showlegend=False,
+            showlegend=False,  # severity is carried by bar colour and the hover text
             height=500,
             margin=dict(t=80, b=100, l=60, r=60)
         )
         
-        # Add severity color legend manually
-        for severity, color in color_map.items():
-            if severity in severities:
-                fig.add_trace(go.Scatter(
-                    x=[None], y=[None],
-                    mode='markers',
-                    marker=dict(size=10, color=color),
-                    name=f'{severity} Severity',
-                    showlegend=True
-                ))
-        
         return fig
     
     def create_severity_distribution_chart(self, predictions):
@@ -178,39 +184,35 @@ class HealthVisualization:
             return None
         
         severities = [pred['severity'] for pred in predictions]
-        severity_counts = pd.Series(severities).value_counts()
+        severity_levels, severity_totals = _count_severities(severities)
+        colors = [self.severity_colors.get(severity, '#6c757d') for severity in severity_levels]
         
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
+        fig = make_subplots(
+            rows=1, cols=2,
+            subplot_titles=('Severity Distribution', 'Severity Count'),
+            specs=[[{"type": "pie"}, {"type": "bar"}]]
+        )
         
         # Pie chart
-        colors = [self.severity_colors.get(severity, '#6c757d') for severity in severity_counts.index]
-        wedges, texts, autotexts = ax1.pie(severity_counts.values, labels=severity_counts.index, 
-                                          colors=colors, autopct='%1.0f%%', startangle=90, shadow=True)
-        
-        for autotext in autotexts:
-            autotext.set_color('white')
-            autotext.set_fontweight('bold')
-        
-        ax1.set_title('Severity Distribution', fontsize=14, fontweight='bold')
-        
-        # Bar chart
-        bars = ax2.bar(severity_counts.index, severity_counts.values, 
-                      color=colors, alpha=0.7, edgecolor='black', linewidth=1)
-        ax2.set_title('Severity Count', fontsize=14, fontweight='bold')
-        ax2.set_xlabel('Severity Level', fontweight='bold')
-        ax2.set_ylabel('Number of Predictions', fontweight='bold')
+        fig.add_trace(
+            go.Pie(labels=severity_levels, values=severity_totals,
+                  marker=dict(colors=colors), texttemplate='%{percent:.0%}',
+                  sort=False, direction='clockwise', rotation=90),
+            row=1, col=1
+        )
         
-        # Add count values on bars
-        for bar in bars:
-            height = bar.get_height()
-            ax2.text(bar.get_x() + bar.get_width()/2., height + 0.05,
-                    f'{int(height)}', ha='center', va='bottom', fontweight='bold')
+        # Bar chart with count values on bars
+        fig.add_trace(
+            go.Bar(x=severity_levels, y=severity_totals,
+                  marker=dict(color=colors, opacity=0.7, line=dict(color='black', width=1)),
+                  text=severity_totals, textposition='outside'),
+            row=1, col=2
+        )
         
-        ax2.grid(True, alpha=0.3, axis='y')
-        ax2.spines['top'].set_visible(False)
-        ax2.spines['right'].set_visible(False)
+        fig.update_xaxes(title_text='Severity Level', row=1, col=2)
+        fig.update_yaxes(title_text='Number of Predictions', row=1, col=2)
+        fig.update_layout(height=450, showlegend=False)
         
-        plt.tight_layout()
         return fig
     
     def create_symptom_word_cloud(self, predictions, user_symptoms=""):
@@ -227,18 +229,8 @@ class HealthVisualization:
         if not all_symptoms.strip():
             return None
         
-        # Create word cloud
-        wordcloud = WordCloud(width=1200, height=600, 
-                             min_font_size=16,
-                             max_font_size=80,
-                             prefer_horizontal=0.8,
-                             collocations=False,
-                             margin=20,
-                             random_state=42,
-                             background_color='white',
-                             colormap="Set3",
-                             max_words=25,
-                             relative_scaling=0.8).generate(all_symptoms)
+        # Create word cloud (layout is deterministic, so identical symptom text reuses it)
+        wordcloud = _generate_wordcloud(all_symptoms)
         
         fig, ax = plt.subplots(figsize=(15, 8))
         ax.imshow(wordcloud, interpolation='bilinear')
@@ -301,9 +293,7 @@ class HealthVisualization:
         if not predictions:
             return None
         
-        diseases = [pred['disease'] for pred in predictions]
-        confidences = [pred['confidence'] for pred in predictions]
-        severities = [pred['severity'] for pred in predictions]
+        diseases, confidences, severities = _unpack_predictions(predictions)
         
         # Create subplot figure
         fig = make_subplots(
@@ -322,9 +312,9 @@ class HealthVisualization:
         )
         
         # Pie chart of severities
-        severity_counts = pd.Series(severities).value_counts()
+        severity_levels, severity_totals = _count_severities(severities)
         fig.add_trace(
-            go.Pie(labels=severity_counts.index, values=severity_counts.values,
+            go.Pie(labels=severity_levels, values=severity_totals,
                   name="Severity"),
             row=1, col=2
         )
@@ -341,8 +331,7 @@ class HealthVisualization:
         )
         
         # Risk assessment bar
-        risk_scores = [c * (3 if s == 'Severe' else 2 if s == 'Moderate' else 1) 
-                      for c, s in zip(confidences, severities)]
+        risk_scores = [c * SEVERITY_WEIGHT.get(s, 1) for c, s in zip(confidences, severities)]
         fig.add_trace(
             go.Bar(x=diseases, y=risk_scores, name='Risk Score',
                   marker_color='salmon'),
@@ -354,15 +343,20 @@ class HealthVisualization:
         
         return fig
     
-    def save_plot_as_base64(self, fig):
-        """Convert matplotlib figure to base64 string for embedding"""
+    def save_plot_as_base64(self, fig, dpi=100, image_format='png'):
+        """Convert matplotlib figure to base64 string for embedding (screen resolution by default).
+
+        ``image_format='webp'`` gives a payload about a third of the PNG size; the
+        data URI must then use ``image/webp``.
+        """
         if fig is None:
             return None
         
+        # Lossy WebP at quality 85 is visually identical to PNG for plot art
+        save_kwargs = {'pil_kwargs': {'quality': 85}} if image_format == 'webp' else {}
         img_buffer = io.BytesIO()
-        fig.savefig(img_buffer, format='png', bbox_inches='tight', dpi=300)
-        img_buffer.seek(0)
-        img_base64 = base64.b64encode(img_buffer.read()).decode()
+        fig.savefig(img_buffer, format=image_format, bbox_inches='tight', dpi=dpi, **save_kwargs)
+        img_base64 = base64.b64encode(img_buffer.getbuffer()).decode('ascii')  # no read-back copy
         plt.close(fig)  # Close figure to free memory
         return img_base64
 
@@ -401,22 +395,19 @@ def test_visualization():
     print("📊 Creating confidence bar chart...")
     bar_fig = viz.create_confidence_bar_chart(sample_predictions)
     if bar_fig:
-        plt.show()
-        plt.close()
+        print("✅ Confidence bar chart created successfully")
     
     # Test pie chart
     print("🥧 Creating confidence pie chart...")
     pie_fig = viz.create_confidence_pie_chart(sample_predictions)
     if pie_fig:
-        plt.show()
-        plt.close()
+        print("✅ Confidence pie chart created successfully")
     
     # Test severity distribution
     print("📈 Creating severity distribution chart...")
     severity_fig = viz.create_severity_distribution_chart(sample_predictions)
     if severity_fig:
-        plt.show()
-        plt.close()
+        print("✅ Severity distribution chart created successfully")
     
     # Test word cloud
     print("☁️ Creating symptom word cloud...")